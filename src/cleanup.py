@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+#  coding=utf-8
+"""
+Command line component to clean the caches of the shop downloader.
+"""
+
+import click
+import os
+
+from scraper.cache import CacheManager, Retention
+from scraper.store import PageStore
+
+
+@click.command()
+@click.option("-k", "--keep-days", default=30.0, type=float, help="Delete files not used for this many days (0: keep all).")
+@click.option("-m", "--max-cache-mb", default=0, type=int, help="Size limit of the page caches in MB (0: no limit).")
+@click.option("-g", "--migrate", is_flag=True, help="Move the pages cached in the former layouts into packs first.")
+def _cmd(keep_days, max_cache_mb, migrate):
+    if migrate:
+        for entry in sorted(os.scandir("../data/page"), key=lambda x: x.name):
+            if entry.is_dir():
+                pickles, objects = PageStore.at(entry.path).migrate()
+                print(f"{entry.name}: moved {pickles} pickled pages and {objects} content files.", flush=True)
+    reclaimed = CacheManager(
+        retention=Retention(
+            days=keep_days,
+            max_bytes=max_cache_mb * 2 ** 20,
+        ),
+    ).clean()
+    if reclaimed.empty:
+        print("Nothing to delete.", flush=True)
+    else:
+        print(reclaimed.to_string(index=False), flush=True)
+
+
+if __name__ == "__main__":
+    _cmd()
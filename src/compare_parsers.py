@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#  coding=utf-8
+"""
+Command line component to compare the parser backends (and the regions) of a shop on its cached pages.
+"""
+
+import click
+import pandas as pd
+import time
+
+from downloader import _module_name
+from importlib import import_module
+from scraper.item import ColNames
+from scraper.page import HTML5PageBase
+from scraper.store import PageStore
+from typing import Optional, Tuple
+
+
+def _parse(
+        page_type: type,
+        module_name: str,
+        date: str,
+        url: str,
+        raw: str,
+) -> Tuple[Optional[pd.DataFrame], int, float]:
+    page = page_type(
+        fetcher=None,
+        name=module_name,
+        base_url="",
+        url_name="",
+        date=date,
+        url_format=url,
+        page=1,
+        item_limit=0,
+        page_size=1,
+    )
+    # without a digest the parsed cache is bypassed
+    page.raw = raw
+    start = time.perf_counter()
+    page.parse()
+    seconds = time.perf_counter() - start
+    df = page.df.drop(columns=[ColNames.raw], errors="ignore").assign(**{ColNames.error: lambda x: x[ColNames.error].map(repr)})
+    return df.reset_index(drop=True), page.max_page, seconds
+
+
+@click.command()
+@click.argument("url")
+@click.option("-d", "--date", required=True, help="Date of the cached pages.")
+@click.option("-b", "--backend", "backends", multiple=True, type=str, default=("html5lib", "lxml", "html.parser"), help="Backends to compare (the first one parsing the whole page is the reference).")
+@click.option("-l", "--limit", default=0, type=int, help="Number of pages to compare (0: all).")
+def _cmd(url, date, backends, limit):
+    module_name = _module_name(url)
+    page_type = import_module(f"shops.{module_name}").Page
+    if not issubclass(page_type, HTML5PageBase):
+        raise click.UsageError(f"{module_name} does not parse HTML.")
+    # the reference parses the whole page, so the `regions` of the page class are checked too
+    reference_name = f"{backends[0]} (whole page)"
+    variants = {
+        reference_name: type(page_type.__name__, (page_type,), dict(parser=backends[0], regions=None, __module__=page_type.__module__)),
+        **{
+            backend: type(page_type.__name__, (page_type,), dict(parser=backend, __module__=page_type.__module__))
+            for backend in backends
+        },
+    }
+    store = PageStore.for_shop(module_name)
+    urls = sorted(store.index(date))
+    if limit > 0:
+        urls = urls[:limit]
+    if not urls:
+        raise click.UsageError(f"No cached pages of {module_name} on {date}.")
+    seconds = dict.fromkeys(variants, 0.0)
+    differences = dict.fromkeys(variants, 0)
+    for page_url in urls:
+        _, raw = store.get(date, page_url)
+        reference = None
+        for backend, variant in variants.items():
+            df, max_page, parse_seconds = _parse(variant, module_name, date, page_url, raw)
+            seconds[backend] += parse_seconds
+            if reference is None:
+                reference = df, max_page
+                continue
+            try:
+                assert max_page == reference[1], f"last page {max_page} instead of {reference[1]}"
+                pd.testing.assert_frame_equal(df, reference[0], check_dtype=False)
+            except AssertionError as e:
+                differences[backend] += 1
+                print(f"{backend} differs on {page_url}:", str(e).strip(), sep="\n", flush=True)
+    summary = pd.DataFrame(
+        [
+            dict(
+                backend=backend,
+                pages=len(urls),
+                different=differences[backend],
+                seconds=round(seconds[backend], 2),
+                speedup=round(seconds[reference_name] / seconds[backend], 2) if seconds[backend] else None,
+            )
+            for backend in variants
+        ],
+    )
+    print(summary.to_string(index=False), flush=True)
+
+
+if __name__ == "__main__":
+    _cmd()
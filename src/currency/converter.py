@@ -2,12 +2,129 @@
 Convert between currencies.
 """
 
-import numpy as np
+import json
+import os
 import pandas as pd
-from currency_converter import CurrencyConverter
+import threading
+from currency_converter import CurrencyConverter, RateNotFoundError
+from datetime import datetime
+from typing import Dict, Optional
 
-__cc = CurrencyConverter()
-"""Currency converter object"""
+DATE_FORMAT = "%Y%m%d"
+"""Format of the run dates."""
+
+
+class RateProvider:
+    """
+    Rates of every currency on a date, as a table of their value in euros (so any pair is a single division).
+    The bundled ECB dataset is only loaded when a table is not cached yet, the tables are cached in a file per date.
+    Dates without a rate (weekends, holidays) take a rate interpolated between the closest ones,
+    dates outside of the dataset take its first or last rate.
+    """
+
+    __providers: Dict[str, "RateProvider"] = {}
+    __providers_lock = threading.Lock()
+    __converter = None
+
+    def __init__(
+            self,
+            date: str,
+            folder: str = "../data/currency",
+    ):
+        self.date = date
+        self.path = f"{folder}/{date}.json"
+        self._lock = threading.Lock()
+        self._table: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def for_date(cls, date: Optional[str] = None) -> "RateProvider":
+        """
+        Get the (shared) provider of a date.
+        :param date: date of the rates (None: today)
+        :return: provider
+        """
+        date = date or datetime.now().strftime(DATE_FORMAT)
+        with cls.__providers_lock:
+            if date not in cls.__providers:
+                cls.__providers[date] = cls(date)
+            return cls.__providers[date]
+
+    @classmethod
+    def _converter(cls):
+        # has to be called holding the lock of the providers
+        if cls.__converter is None:
+            cls.__converter = CurrencyConverter(
+                fallback_on_missing_rate=True,
+                fallback_on_wrong_date=True,
+            )
+        return cls.__converter
+
+    def _compute(self) -> Dict[str, float]:
+        day = datetime.strptime(self.date, DATE_FORMAT).date()
+        with self.__providers_lock:
+            converter = self._converter()
+            table = {}
+            for currency in sorted(converter.currencies):
+                try:
+                    table[currency] = converter.convert(1, currency, "EUR", date=day)
+                except (RateNotFoundError, ValueError):
+                    continue
+        return table
+
+    @property
+    def table(self) -> Dict[str, float]:
+        """Value of a unit of each currency in euros."""
+        with self._lock:
+            if self._table is None:
+                if os.path.isfile(self.path):
+                    with open(self.path, "r") as fin:
+                        self._table = json.load(fin)
+                else:
+                    self._table = self._compute()
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w") as fout:
+                        json.dump(self._table, fout, indent=1)
+                    os.replace(tmp_path, self.path)
+            return self._table
+
+    def rate(
+            self,
+            from_currency: str,
+            to_currency: str,
+    ) -> float:
+        """
+        Get conversion between currencies.
+        :param from_currency: from
+        :param to_currency: to
+        :return: conversion rate
+        """
+        table = self.table
+        return table[from_currency] / table[to_currency]
+
+
+def parse_prices(
+        series: pd.Series,
+) -> pd.Series:
+    """
+    Parse prices: numbers are kept, everything non-numeric is dropped from strings (currency signs, spaces, text).
+    A separator followed by one or two digits at the end of a string is the decimal point, any other separator groups
+    thousands (so "1.234,56", "1,234.56", "1.234", "1,234" and "12,5" are all read right).
+    :param series: prices (strings or numbers)
+    :return: prices as floats (NaN where there is no number)
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    strings = series.map(lambda x: isinstance(x, str)).to_numpy(dtype=bool)
+    numbers = pd.to_numeric(series.where(~strings), errors="coerce").astype(float)
+    if not strings.any():
+        return numbers
+    digits = series[strings].str.replace(r"[^0-9.,]", "", regex=True)
+    decimals = digits.str.extract(r"[.,]([0-9]{1,2})$", expand=False).fillna("0")
+    integers = digits.str.replace(r"[.,][0-9]{1,2}$", "", regex=True).str.replace(r"[.,]", "", regex=True)
+    parsed = pd.to_numeric(integers + "." + decimals, errors="coerce").where(digits.str.contains("[0-9]"))
+    numbers[strings] = parsed.to_numpy(dtype=float)
+    return numbers
 
 
 def convert_value(
@@ -15,33 +132,27 @@ def convert_value(
         rate: float,
 ) -> float:
     """
-    Convert a value using a rate. Drop everything non-numeric from the string representation first.
+    Convert a value using a rate (see: `parse_prices`).
     :param value: value to convert (string or float)
     :param rate: rate to multiply by
-    :return: converted value or np.NaN
+    :return: converted value or NaN
     """
-    try:
-        value = "".join([
-            c
-            for c in str(value).replace(",", ".")
-            if c in "0123456789."
-        ])
-        return float(value) * rate
-    except (TypeError, ValueError):
-        return np.NaN
+    return float(convert_series(pd.Series([value], dtype=object), rate=rate).iloc[0])
 
 
 def get_rate(
         from_currency: str,
         to_currency: str,
+        date: Optional[str] = None,
 ) -> float:
     """
     Get conversion between currencies.
     :param from_currency: from
     :param to_currency: to
+    :param date: date of the rate (None: today)
     :return: conversion rate
     """
-    return round(__cc.convert(1, from_currency, to_currency), 3)
+    return round(RateProvider.for_date(date).rate(from_currency, to_currency), 3)
 
 
 def convert_series(
@@ -49,12 +160,9 @@ def convert_series(
         rate: float,
 ) -> pd.Series:
     """
-    Convert series (multiply by rate) from one currency to the other.
+    Convert series (multiply by rate) from one currency to the other (see: `parse_prices`).
     :param series: series to convert
     :param rate: rate to multiply by
     :return: converted series
     """
-    return (
-        series
-        .map(lambda x: convert_value(x, rate=rate))
-    )
+    return parse_prices(series) * rate
@@ -6,19 +6,24 @@ Command line component to the shop downloader.
 
 import click
 import logging
+import pandas as pd
+import pkgutil
+import shops
+import sys
+import time
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from importlib import import_module
 from importlib import util as import_util
+from scraper.cache import CacheManager, Retention
+from scraper.item import ColNames
+from scraper.sink import SINKS
+from typing import Any, Dict, List
 
 
-@click.command()
-@click.argument("url")
-@click.option("-t/ ", "--test-mode/--normal-mode", default=False)
-@click.option(" /-p", "--public/--private", default=True)
-@click.option("-d", "--date-override", default=None)
-def _cmd(url, test_mode, public, date_override):
-    logger = logging.Logger(name="shops")
+def _module_name(url: str) -> str:
     if url.startswith("http://"):
         url = url[7:]
     elif url.startswith("https://"):
@@ -26,7 +31,87 @@ def _cmd(url, test_mode, public, date_override):
     if url.startswith("www."):
         url = url[4:]
     url = url.split("/")[0]
-    module_name = ''.join((i for i in url if i.isalnum()))
+    return ''.join((i for i in url if i.isalnum()))
+
+
+def _all_module_names() -> List[str]:
+    return [
+        module.name
+        for module in pkgutil.iter_modules(shops.__path__)
+        if not module.ispkg
+    ]
+
+
+def _run(
+        module_name: str,
+        date: str,
+        public: bool,
+        upload_delta: bool,
+        params: Dict[str, Any],
+) -> Dict[str, Any]:
+    logger = logging.Logger(name=f"shops.{module_name}")
+    start = time.monotonic()
+    summary = dict(
+        shop=module_name,
+        items=0,
+        errors=0,
+        missing=0,
+        changes=None,
+        status="OK",
+    )
+    try:
+        logger.info("Downloading...")
+        shop_module = import_module(f"shops.{module_name}")
+        # noinspection PyUnresolvedReferences
+        shop = shop_module.Shop(
+            date=date,
+            **params,
+        )
+        summary["items"] = int(shop.df[ColNames.error].isna().sum())
+        summary["errors"] = int(shop.df[ColNames.error].notna().sum())
+        summary["missing"] = len(shop.missing_pages)
+        summary["changes"] = len(shop.delta) if shop.delta is not None else None
+        if public:
+            logger.info("Uploading...")
+            shop.upload()
+            if upload_delta:
+                shop.upload_delta()
+    except Exception as e:
+        logger.exception("Failed.")
+        summary["status"] = f"{type(e).__name__}: {e}"
+    summary["seconds"] = round(time.monotonic() - start, 1)
+    return summary
+
+
+@click.command()
+@click.argument("urls", nargs=-1)
+@click.option("-a", "--all", "all_shops", is_flag=True, help="Download every shop implemented.")
+@click.option("-t/ ", "--test-mode/--normal-mode", default=False)
+@click.option(" /-p", "--public/--private", default=True)
+@click.option("-d", "--date-override", default=None)
+@click.option("-u", "--upload-delta", is_flag=True, help="Upload the changes since the previous run too (when public).")
+@click.option("-n", "--drivers", default=1, type=int, help="Number of fetchers (browsers or HTTP sessions) working in parallel.")
+@click.option("-j", "--jobs", default=1, type=int, help="Number of shops downloaded in parallel.")
+@click.option("-o", "--offline", "--replay", is_flag=True, help="Only use cached pages, fail on the first one missing.")
+@click.option("-w", "--parse-workers", default=0, type=int, help="Number of processes parsing the pages of a shop (0: parse in the crawler).")
+@click.option("-r", "--reparse", is_flag=True, help="Parse every cached page again (implies --offline, ignores earlier parses and runs).")
+@click.option("-x", "--keep-raw", is_flag=True, help="Keep the references to the raw items in the output (see: show_item.py).")
+@click.option("-f", "--format", "formats", multiple=True, default=("parquet",), type=click.Choice(list(SINKS)), help="Output formats (can be repeated).")
+@click.option("-k", "--keep-days", default=30.0, type=float, help="Delete cached files not used for this many days (0: keep all).")
+@click.option("-m", "--max-cache-mb", default=0, type=int, help="Size limit of the page caches in MB (0: no limit).")
+def _cmd(urls, all_shops, test_mode, public, date_override, upload_delta, drivers, jobs, offline, parse_workers, reparse, keep_raw,
+         formats, keep_days, max_cache_mb):
+    logger = logging.Logger(name="shops")
+    if all_shops:
+        module_names = _all_module_names()
+    else:
+        module_names = list(OrderedDict.fromkeys(map(_module_name, urls)))
+    if not module_names:
+        raise click.UsageError("Specify at least one shop url or use --all.")
+    for module_name in module_names:
+        if import_util.find_spec(f"shops.{module_name}") is None:
+            logger.error(f"No such shop implemented: {module_name}")
+            raise NotImplementedError()
     if test_mode:
         test_params = dict(
             url_limit=2,
@@ -36,21 +121,46 @@ def _cmd(url, test_mode, public, date_override):
         )
     else:
         test_params = dict()
-    logger.info("Downloading...")
-    shop_module = import_util.find_spec(f"shops.{module_name}")
-    if shop_module is not None:
-        shop_module = import_module(f"shops.{module_name}")
-        # noinspection PyUnresolvedReferences
-        shop = shop_module.Shop(
-            date=date_override or datetime.strftime(datetime.now(), "%Y%m%d"),
+    run_params = dict(
+        date=date_override or datetime.strftime(datetime.now(), "%Y%m%d"),
+        public=public,
+        upload_delta=upload_delta,
+        params=dict(
+            drivers=drivers,
+            offline=offline,
+            parse_workers=parse_workers,
+            reparse=reparse,
+            keep_raw=keep_raw,
+            sink_types=tuple(SINKS[output_format] for output_format in formats),
             **test_params,
-        )
+        ),
+    )
+    if jobs > 1 and len(module_names) > 1:
+        # workers are forked after `scraper` (pandas, selenium) is imported, so they don't import it again
+        # (the currency rates are loaded lazily by each worker, from the cached table of the date if there is one)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(_run, module_name, **run_params)
+                for module_name in module_names
+            ]
+            summaries = [future.result() for future in futures]
     else:
-        logger.error("No such shop implemented.")
-        raise NotImplementedError()
-    if public:
-        logger.info("Uploading...")
-        shop.upload()
+        summaries = [
+            _run(module_name, **run_params)
+            for module_name in module_names
+        ]
+    summary = pd.DataFrame.from_records(summaries)
+    print(summary.to_string(index=False), flush=True)
+    reclaimed = CacheManager(
+        retention=Retention(
+            days=keep_days,
+            max_bytes=max_cache_mb * 2 ** 20,
+        ),
+    ).clean()
+    if not reclaimed.empty:
+        print("Deleted from the caches:", reclaimed.to_string(index=False), sep="\n", flush=True)
+    if (summary.status != "OK").any():
+        sys.exit(1)
 
 
 if __name__ == "__main__":
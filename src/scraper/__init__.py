@@ -2,8 +2,14 @@
 Classes for the scraper to be based on.
 """
 
+from .crawler import RateLimit
+from .extract import Field
+from .fetcher import HTTPFetcher
+from .fetcher import Readiness
+from .fetcher import SeleniumFetcher
 from .item import SingleShopItem
 from .item import CompositeShopItem
 from .page import HTML5PageBase
 from .page import JSONPageBase
+from .page import Region
 from .shop import ShopBase
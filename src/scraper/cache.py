@@ -0,0 +1,147 @@
+"""
+Retention of the on-disk caches and outputs.
+"""
+
+import os
+import pandas as pd
+import shutil
+import time
+from .store import PageStore
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+
+class Retention(NamedTuple):
+    """
+    Retention settings of the data folder.
+    """
+    days: float = 30
+    """Files not written or read for this many days are deleted (0: no age limit)."""
+    max_bytes: int = 0
+    """Size limit of the page and parsed caches together, least recently used first out (0: no size limit)."""
+
+
+class _Entry(NamedTuple):
+    last_used: float
+    cache: str
+    remove: Callable[[], Tuple[int, int]]
+
+
+class CacheManager:
+    """
+    Delete the cached pages, parsed pages, outputs, run manifests and currency rates not used recently,
+    then the least recently used cached pages until the caches fit in the size limit.
+    Cached pages are deleted a date at a time (the contents shared with other dates are kept in their packs).
+    """
+
+    def __init__(
+            self,
+            folder: str = "../data",
+            retention: Retention = Retention(),
+    ):
+        self.folder = folder
+        self.retention = retention
+        self._reclaimed: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def _subfolders(path: str) -> List[str]:
+        if not os.path.isdir(path):
+            return []
+        return sorted(entry.path for entry in os.scandir(path) if entry.is_dir())
+
+    def _files(self, name: str) -> List[str]:
+        return sorted(
+            os.path.join(root, file_name)
+            for root, _, file_names in os.walk(f"{self.folder}/{name}")
+            for file_name in file_names
+            if file_name != ".gitignore"
+        )
+
+    def _record(self, cache: str, files: int, size: int):
+        reclaimed = self._reclaimed.setdefault(cache, [0, 0])
+        reclaimed[0] += files
+        reclaimed[1] += size
+
+    @staticmethod
+    def _remove_file(path: str) -> Tuple[int, int]:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return 1, size
+
+    @staticmethod
+    def _remove_folder(path: str) -> Tuple[int, int]:
+        paths = [
+            os.path.join(root, file_name)
+            for root, _, file_names in os.walk(path)
+            for file_name in file_names
+        ]
+        size = sum(map(os.path.getsize, paths))
+        shutil.rmtree(path, ignore_errors=True)
+        return len(paths), size
+
+    def _entries(self) -> List[_Entry]:
+        entries = []
+        for folder in self._subfolders(f"{self.folder}/page"):
+            store = PageStore.at(folder)
+            for date in store.dates():
+                entries.append(_Entry(
+                    last_used=store.last_used(date),
+                    cache="page",
+                    remove=lambda store=store, date=date: store.remove_dates([date]),
+                ))
+        for path in self._files("parsed"):
+            entries.append(_Entry(
+                last_used=os.path.getmtime(path),
+                cache="parsed",
+                remove=lambda path=path: self._remove_file(path),
+            ))
+        return entries
+
+    def _size(self) -> int:
+        return sum(
+            os.path.getsize(path)
+            for name in ("page", "parsed")
+            for path in self._files(name)
+        )
+
+    def _evict_old(self):
+        cutoff = time.time() - self.retention.days * 24 * 60 * 60
+        for entry in self._entries():
+            if entry.last_used < cutoff:
+                self._record(entry.cache, *entry.remove())
+        for name in ("shop", "delta", "currency"):
+            for path in self._files(name):
+                if os.path.getmtime(path) < cutoff:
+                    self._record(name, *self._remove_file(path))
+        for shop_folder in self._subfolders(f"{self.folder}/run"):
+            for run_folder in self._subfolders(shop_folder):
+                manifest_path = f"{run_folder}/manifest.jsonl"
+                last_used = os.path.getmtime(manifest_path if os.path.isfile(manifest_path) else run_folder)
+                if last_used < cutoff:
+                    self._record("run", *self._remove_folder(run_folder))
+
+    def _evict_least_recently_used(self):
+        size = self._size()
+        for entry in sorted(self._entries(), key=lambda x: x.last_used):
+            if size <= self.retention.max_bytes:
+                break
+            files, entry_size = entry.remove()
+            self._record(entry.cache, files, entry_size)
+            size -= entry_size
+
+    def clean(self) -> pd.DataFrame:
+        """
+        Apply the retention settings.
+        :return: number and size of the deleted files per cache
+        """
+        self._reclaimed = {}
+        if self.retention.days > 0:
+            self._evict_old()
+        if self.retention.max_bytes > 0:
+            self._evict_least_recently_used()
+        return pd.DataFrame(
+            [
+                dict(cache=cache, files=files, megabytes=round(size / 2 ** 20, 1))
+                for cache, (files, size) in sorted(self._reclaimed.items())
+            ],
+            columns=["cache", "files", "megabytes"],
+        )
@@ -0,0 +1,395 @@
+"""
+Asyncio engine driving the page pipeline with per-host rate limiting.
+"""
+
+import asyncio
+import random
+import time
+from .fetcher import CacheMissError, FetchError
+from .manifest import Manifest
+from .page import PageBase, parse_remote
+from .pool import ResourcePool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tqdm import tqdm
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class RateLimit(NamedTuple):
+    """
+    Politeness settings of a host.
+    """
+    per_second: float
+    """Sustained number of requests per second."""
+    max_in_flight: int = 1
+    """Number of requests running at the same time."""
+    burst: int = 1
+    """Number of requests which can be started at once after being idle."""
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Retrying transient fetch failures with exponential backoff.
+    """
+    attempts: int = 3
+    """Number of attempts per page."""
+    base_delay: float = 1.0
+    """Seconds to wait after the first failure (doubled after each further one)."""
+    max_delay: float = 30.0
+    """Upper bound of the wait between attempts."""
+    jitter: float = 0.5
+    """Fraction of the wait which is randomized."""
+    deadline: float = 120.0
+    """Seconds a page may take with all its attempts."""
+
+    def delay(self, attempt: int) -> float:
+        """
+        Seconds to wait after a failed attempt.
+        :param attempt: index of the failed attempt (0..)
+        :return: seconds
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of fetching from a host which failed too many times.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stop fetching from a host after consecutive failures, try again after a cooldown.
+    """
+
+    def __init__(
+            self,
+            threshold: int = 5,
+            cooldown: float = 300.0,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether fetches are refused."""
+        return self.failures >= self.threshold and time.monotonic() - self._opened < self.cooldown
+
+    def success(self):
+        """
+        Record a successful fetch.
+        """
+        self.failures = 0
+
+    def failure(self):
+        """
+        Record a failed fetch.
+        """
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self._opened = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the request rate and the number of requests in flight towards a host.
+    Has to be created inside the event loop using it.
+    """
+
+    def __init__(
+            self,
+            limit: RateLimit,
+    ):
+        assert limit.per_second > 0, "Rate has to be positive."
+        self.limit = limit
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(limit.max_in_flight)
+
+    async def _take_token(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.limit.burst),
+                    self._tokens + (now - self._updated) * self.limit.per_second,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.limit.per_second)
+
+    async def __aenter__(self):
+        await self._in_flight.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._in_flight.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._in_flight.release()
+
+
+class Crawler:
+    """
+    Load and parse pages in a pipeline: the next pages are loaded while the current one is parsed.
+    Fetches are throttled and guarded by a circuit breaker per host, failed fetches are retried.
+    Cached pages are neither throttled nor retried, pages finished according to the manifest are not even parsed.
+    Fetches run in threads of their own (one per fetcher), so parsing never holds up a fetcher.
+    Pages are parsed in a thread of their own or, with parse workers, in worker processes (as many at a time as there
+    are workers).
+    Has to be created inside the event loop using it.
+    """
+
+    def __init__(
+            self,
+            fetcher_pool: ResourcePool,
+            rate_limit: RateLimit,
+            retry: RetryPolicy = RetryPolicy(),
+            prefetch: int = 0,
+            failure_threshold: int = 5,
+            cooldown: float = 300.0,
+            manifest: Optional[Manifest] = None,
+            parse_workers: int = 0,
+    ):
+        self.fetcher_pool = fetcher_pool
+        self.rate_limit = rate_limit
+        self.retry = retry
+        self.prefetch = prefetch or 2 * fetcher_pool.size
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.manifest = manifest
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.parse_workers = parse_workers
+        # a thread per fetcher and one for reading and writing the caches and the manifest
+        self._executor = ThreadPoolExecutor(max_workers=fetcher_pool.size + 1)
+        self._parse_executor = (
+            ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else ThreadPoolExecutor(max_workers=1)
+        )
+
+    def limiter(self, url: str) -> RateLimiter:
+        """
+        Get the rate limiter of the host of an url.
+        :param url: url to be fetched
+        :return: rate limiter
+        """
+        host = urlparse(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = RateLimiter(self.rate_limit)
+        return self._limiters[host]
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of the host of an url.
+        :param url: url to be fetched
+        :return: circuit breaker
+        """
+        host = urlparse(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                threshold=self.failure_threshold,
+                cooldown=self.cooldown,
+            )
+        return self._breakers[host]
+
+    async def _run(self, func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _fetch(self, page: PageBase, acquired: Callable[[], None]) -> Tuple[str, Optional[float]]:
+        with self.fetcher_pool.acquire() as fetcher:
+            acquired()
+            return page.download(fetcher)
+
+    async def _load(self, page: PageBase):
+        if page.is_cached:
+            await self._run(page.load, None)
+            return
+        loop = asyncio.get_running_loop()
+        breaker = self.breaker(page.url)
+        deadline = None
+        for attempt in range(self.retry.attempts):
+            if breaker.is_open:
+                raise CircuitOpenError(f"Skipped {page.url} after {breaker.failures} failures on the host")
+            try:
+                async with self.limiter(page.url):
+                    acquired = asyncio.Event()
+                    fetching = asyncio.ensure_future(
+                        self._run(self._fetch, page, lambda event=acquired: loop.call_soon_threadsafe(event.set))
+                    )
+                    # a fetch given up on still finishes in its thread (returning the fetcher), its result is dropped
+                    fetching.add_done_callback(lambda x: x.cancelled() or x.exception())
+                    waiting = asyncio.ensure_future(acquired.wait())
+                    try:
+                        await asyncio.wait([fetching, waiting], return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        waiting.cancel()
+                    # the deadline starts once a fetcher is acquired, not while waiting for one
+                    if deadline is None:
+                        deadline = time.monotonic() + self.retry.deadline
+                    raw, wait_time = await asyncio.wait_for(
+                        asyncio.shield(fetching),
+                        timeout=max(deadline - time.monotonic(), 0),
+                    )
+            except (FetchError, asyncio.TimeoutError):
+                breaker.failure()
+                delay = self.retry.delay(attempt)
+                if attempt + 1 >= self.retry.attempts or time.monotonic() + delay >= deadline:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                breaker.success()
+                await self._run(page.use_download, raw, wait_time)
+                return
+
+    async def page(
+            self,
+            new_page: Callable[..., PageBase],
+            page: int,
+    ) -> PageBase:
+        """
+        Load and parse a single page.
+        :param new_page: page factory (taking the fetcher and the page number)
+        :param page: page number
+        :return: the page (with errors recorded in its DataFrame)
+        :raise CacheMissError: when working offline and the page is not cached
+        """
+        result = new_page(fetcher=None, page=page)
+        if not await self._restore(result):
+            await self._parse(result, self._load(result))
+        return result
+
+    async def _restore(self, page: PageBase) -> bool:
+        if self.manifest is None:
+            return False
+        return await self._run(self.manifest.restore, page)
+
+    def _finish(self, page: PageBase):
+        if self.manifest is not None:
+            self.manifest.finish(page)
+
+    def _parse_and_finish(self, page: PageBase):
+        page.parse()
+        self._finish(page)
+
+    async def _parse_in_process(self, page: PageBase):
+        if not await self._run(page.parse_cached):
+            page.use_parsed(
+                await asyncio.get_running_loop().run_in_executor(self._parse_executor, parse_remote, page)
+            )
+        await self._run(self._finish, page)
+
+    async def _parse(
+            self,
+            page: PageBase,
+            loading: Awaitable,
+    ):
+        try:
+            await loading
+        except CacheMissError:
+            raise
+        except Exception as e:
+            page.fail(e, loading=True)
+        else:
+            if self.parse_workers > 0:
+                await self._parse_in_process(page)
+            else:
+                await asyncio.get_running_loop().run_in_executor(self._parse_executor, self._parse_and_finish, page)
+
+    def _max_page(self, first: PageBase) -> int:
+        if first.is_missing:
+            return 1
+        max_page = first.max_page
+        if self.manifest is not None and first.error is None:
+            self.manifest.set_max_page(first.url_format, max_page)
+        return max_page
+
+    async def pages(
+            self,
+            new_page: Callable[..., PageBase],
+            page_limit: int = 0,
+    ) -> List[PageBase]:
+        """
+        Load and parse the first page, then the further pages in a pipeline.
+        Pages are loaded (at most `prefetch` ahead) while the earlier ones are parsed (one at a time or in the workers).
+        :param new_page: page factory (taking the fetcher and the page number)
+        :param page_limit: last page to load (0: use the last page according to the first page)
+        :return: pages in order
+        """
+        first = new_page(fetcher=None, page=1)
+        known_max_page = self.manifest.max_page(first.url_format) if self.manifest is not None else None
+        if known_max_page is None or not await self._restore(first):
+            await self._parse(first, self._load(first))
+        if page_limit < 1:
+            page_limit = known_max_page or self._max_page(first)
+        loaded = asyncio.Queue(maxsize=self.prefetch)
+
+        async def produce():
+            for p in range(2, page_limit+1):
+                page = new_page(fetcher=None, page=p)
+                if await self._restore(page):
+                    await loaded.put((page, None))
+                else:
+                    await loaded.put((page, asyncio.ensure_future(self._load(page))))
+
+        parsing = asyncio.Semaphore(max(self.parse_workers, 1))
+        parses = []
+        cache_misses = []
+
+        async def parse(page: PageBase, loading: Awaitable):
+            try:
+                await self._parse(page, loading)
+            except CacheMissError as e:
+                cache_misses.append(e)
+            finally:
+                parsing.release()
+
+        producer = asyncio.ensure_future(produce())
+        pages = [first]
+        try:
+            for _ in tqdm(range(2, page_limit+1)):
+                await parsing.acquire()
+                if cache_misses:
+                    raise cache_misses[0]
+                page, loading = await self._next(loaded, producer)
+                if loading is None:
+                    parsing.release()
+                else:
+                    parses.append(asyncio.ensure_future(parse(page, loading)))
+                pages.append(page)
+            await asyncio.gather(*parses)
+            if cache_misses:
+                raise cache_misses[0]
+        finally:
+            producer.cancel()
+            for pending in parses:
+                pending.cancel()
+            while not loaded.empty():
+                _, loading = loaded.get_nowait()
+                if loading is not None:
+                    loading.cancel()
+        return pages
+
+    @staticmethod
+    async def _next(loaded: asyncio.Queue, producer: asyncio.Future) -> Tuple[PageBase, Optional[asyncio.Future]]:
+        # the error of the producer (e.g. restoring or creating a page) is raised instead of waiting forever
+        getting = asyncio.ensure_future(loaded.get())
+        await asyncio.wait([getting, producer], return_when=asyncio.FIRST_COMPLETED)
+        if not getting.done() and producer.done() and producer.exception() is not None:
+            getting.cancel()
+            raise producer.exception()
+        return await getting
+
+    def close(self):
+        """
+        Wait for the running fetches and parses, release the worker threads and processes.
+        """
+        self._executor.shutdown(wait=True)
+        self._parse_executor.shutdown(wait=True)
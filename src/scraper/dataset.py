@@ -0,0 +1,117 @@
+"""
+Historical dataset of the items of every shop.
+"""
+
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from .item import ColNames
+from .sink import DTYPES, typed
+from slugify import slugify
+from typing import Iterable, List, Optional
+
+SCHEMA = pa.schema([
+    (name, pa.float64() if dtype == "float64" else pa.string())
+    for name, dtype in DTYPES.items()
+    if name != ColNames.raw
+])
+"""Columns of the dataset (the partitions add `shop` and `date`)."""
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("shop", pa.string()), ("date", pa.string())]),
+    flavor="hive",
+)
+"""Partitions of the dataset: a folder per shop, a folder per date in it."""
+
+
+class Dataset:
+    """
+    Items of every full run of every shop, partitioned by shop and date (`shop=<shop>/date=<date>/`).
+    A run replaces the partition of its shop and date, so running a day again does not duplicate it.
+    Reading only opens the partitions and columns asked for and skips the row groups filtered out.
+    """
+
+    def __init__(
+            self,
+            folder: str = "../data/dataset",
+    ):
+        self.folder = folder
+
+    def _partition_path(self, shop: str, date: str) -> str:
+        return f"{self.folder}/shop={slugify(shop)}/date={date}"
+
+    def dates(self, shop: str) -> List[str]:
+        """
+        Get the dates of the runs of a shop.
+        :param shop: name of the shop
+        :return: dates
+        """
+        folder = f"{self.folder}/shop={slugify(shop)}"
+        if not os.path.isdir(folder):
+            return []
+        return sorted(
+            entry.name[len("date="):]
+            for entry in os.scandir(folder)
+            if entry.is_dir() and entry.name.startswith("date=")
+        )
+
+    def append(self, shop: str, date: str, df: pd.DataFrame) -> str:
+        """
+        Add the items of a run.
+        :param shop: name of the shop
+        :param date: date of the run
+        :param df: DataFrame of the shop
+        :return: path of the partition
+        """
+        path = self._partition_path(shop, date)
+        os.makedirs(path, exist_ok=True)
+        table = pa.Table.from_pandas(
+            typed(df.reindex(columns=SCHEMA.names)),
+            schema=SCHEMA,
+            preserve_index=False,
+        )
+        tmp_path = f"{path}/.part-0.parquet.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, f"{path}/part-0.parquet")
+        return path
+
+    def read(
+            self,
+            shops: Optional[Iterable[str]] = None,
+            start: Optional[str] = None,
+            end: Optional[str] = None,
+            columns: Optional[List[str]] = None,
+            where: Optional[ds.Expression] = None,
+    ) -> pd.DataFrame:
+        """
+        Read items of the dataset.
+        :param shops: names of the shops (None: every shop)
+        :param start: first date (None: from the first run)
+        :param end: last date (None: until the last run)
+        :param columns: columns to read, `shop` and `date` included (None: every column)
+        :param where: condition of the rows on the other columns, e.g. `ds.field("discount") > 20` (None: every row)
+        :return: items
+        """
+        schema = pa.unify_schemas([SCHEMA, PARTITIONING.schema])
+        if not os.path.isdir(self.folder):
+            return schema.empty_table().select(columns or schema.names).to_pandas()
+        condition = where
+        if shops is not None:
+            condition = self._and(condition, ds.field("shop").isin([slugify(shop) for shop in shops]))
+        if start is not None:
+            condition = self._and(condition, ds.field("date") >= start)
+        if end is not None:
+            condition = self._and(condition, ds.field("date") <= end)
+        dataset = ds.dataset(
+            self.folder,
+            schema=schema,
+            format="parquet",
+            partitioning=PARTITIONING,
+        )
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    @staticmethod
+    def _and(condition: Optional[ds.Expression], expression: ds.Expression) -> ds.Expression:
+        return expression if condition is None else condition & expression
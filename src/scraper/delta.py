@@ -0,0 +1,89 @@
+"""
+Changes of the items of a shop since its previous run.
+"""
+
+import pandas as pd
+from .item import ColNames
+from .sink import typed
+
+DESCRIBED = ["group", "title", "url"]
+"""Columns describing the changed items (the current values, the previous ones for removed items)."""
+
+COMPARED = ["orig_price", "orig_old_price", "stock"]
+"""Columns compared (prices in the currency of the shop, so the change of the rate is not a change)."""
+
+
+def normalize_urls(urls: pd.Series) -> pd.Series:
+    """
+    Drop the parts of the urls which do not identify an item (scheme, "www.", fragment, trailing slash).
+    :param urls: urls
+    :return: normalized urls
+    """
+    return (
+        urls
+        .astype("string")
+        .str.strip()
+        .str.replace(r"^https?://(www\.)?", "", regex=True)
+        .str.replace(r"#.*$", "", regex=True)
+        .str.rstrip("/")
+    )
+
+
+def item_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    Identity of the items: the group, the normalized url and the index of the row among the rows of the same url
+    in the same group (the conditions of a composite item, see: nobleknight.com), as "<group>|<url>#<index>".
+    An item listed in several groups (e.g. new releases and offers) is an item per group, so the keys are unique
+    and every group is compared to the same group of the previous run. Has to be computed in the order of the pages.
+    :param df: items
+    :return: keys (NA without an url)
+    """
+    urls = normalize_urls(df.url)
+    variants = df.assign(**{ColNames.key: urls}).groupby(["group", ColNames.key], dropna=False).cumcount()
+    return df.group.astype("string") + "|" + urls + "#" + variants.astype("string")
+
+
+def _indexed(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        typed(df[[ColNames.key] + DESCRIBED + COMPARED])
+        .dropna(subset=[ColNames.key])
+        .drop_duplicates(subset=[ColNames.key])
+        .set_index(ColNames.key)
+    )
+
+
+def delta(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the items of a run to the items of the previous run.
+    :param previous: items of the previous run
+    :param current: items of the run
+    :return: the new, removed and changed items with the previous and current values (`change` tells which)
+    """
+    previous = _indexed(previous)
+    current = _indexed(current)
+    merged = previous.join(current, how="outer", lsuffix="_old", rsuffix="_new")
+    is_new = ~merged.index.isin(previous.index)
+    is_removed = ~merged.index.isin(current.index)
+    change = pd.Series("", index=merged.index, dtype="string")
+    for column in COMPARED:
+        old, new = merged[f"{column}_old"], merged[f"{column}_new"]
+        same = (old == new).fillna(False).astype(bool) | (old.isna() & new.isna())
+        change = change.mask(~same, change + f"{column},")
+    change = change.str.rstrip(",").mask(is_new, "new").mask(is_removed, "removed")
+    result = pd.DataFrame(
+        {
+            "change": change,
+            **{
+                column: merged[f"{column}_new"].fillna(merged[f"{column}_old"])
+                for column in DESCRIBED
+            },
+            **{
+                f"{column}_{suffix}": merged[f"{column}_{suffix}"]
+                for column in COMPARED
+                for suffix in ("old", "new")
+            },
+            "price_change": merged.orig_price_new - merged.orig_price_old,
+        },
+        index=merged.index,
+    )
+    return result[change != ""].reset_index()
@@ -0,0 +1,173 @@
+"""
+Declarative extraction of item fields.
+"""
+
+import bs4
+import re
+import soupsieve
+import threading
+from collections import Counter
+from .item import Record, ShopItem
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+
+class Field:
+    """
+    Extraction of an item field: the text (or an attribute) of the first tag matching a CSS selector (or of all of them),
+    narrowed by a regex, converted by a post-processor and prefixed by the base url of the shop, in this order.
+    A field which can't be extracted (no tag matched or any step failed) gets its default value:
+    None, or NaN for the numbers (see: `Record`), not an empty string.
+    """
+
+    def __init__(
+            self,
+            select: Optional[str] = None,
+            attr: Optional[str] = None,
+            regex: Optional[str] = None,
+            post: Optional[Callable[[Any], Any]] = None,
+            many: bool = False,
+            default: Any = None,
+            *,
+            strip: bool = True,
+            tag: bool = False,
+            base: bool = False,
+    ):
+        """
+        :param select: CSS selector (None: the item itself)
+        :param attr: attribute to read (None: the text)
+        :param regex: regex to search the value for (the first group if there is one, the match otherwise)
+        :param post: post-processor of the value (of the list of values if `many`)
+        :param many: whether all the matching tags are used (as a list)
+        :param default: value on failure (None: the initial value of the record)
+        :param strip: whether to strip the whitespace around the values
+        :param tag: whether the tags themselves are the values (`attr`, `regex` and `strip` are ignored)
+        :param base: whether to prefix the value with the base url of the shop
+        """
+        self.select = select
+        self.attr = attr
+        self.regex = re.compile(regex) if regex is not None else None
+        self.post = post
+        self.many = many
+        self.default = default
+        self.strip = strip
+        self.tag = tag
+        self.base = base
+
+    def value(self, tag: bs4.Tag) -> Any:
+        """
+        Get the value of a matched tag.
+        :param tag: the tag
+        :return: the value
+        """
+        if self.tag:
+            return tag
+        value = tag.get_text() if self.attr is None else tag.get(self.attr)
+        if self.strip:
+            value = value.strip()
+        if self.regex is not None:
+            match = self.regex.search(value)
+            if match is None:
+                raise ValueError(f"No match for {self.regex.pattern} in {value!r}")
+            value = match.group(1) if match.groups() else match.group(0)
+        return value
+
+
+class Extractor:
+    """
+    Apply the fields of a page class to its items.
+    Selectors are compiled once and every distinct selector is matched once per item.
+    Failures are counted per field (see: `failures`), until they are taken (see: `take`, a run of a shop starts with it).
+    """
+
+    def __init__(
+            self,
+            item_type: Type[ShopItem],
+            fields: Dict[str, Field],
+    ):
+        self.item_type = item_type
+        self.fields = fields
+        self._selectors = {
+            field.select: soupsieve.compile(field.select)
+            for field in fields.values()
+            if field.select is not None
+        }
+        self._select_all = {field.select for field in fields.values() if field.many}
+        self._lock = threading.Lock()
+        self.items = 0
+        """Number of items extracted."""
+        self.failures = Counter()
+        """Number of items each field could not be extracted from."""
+
+    def _match(self, item: bs4.Tag) -> Dict[Optional[str], List[bs4.Tag]]:
+        matches = {None: [item]}
+        for select, selector in self._selectors.items():
+            if select in self._select_all:
+                matches[select] = selector.select(item)
+            else:
+                tag = selector.select_one(item)
+                matches[select] = [] if tag is None else [tag]
+        return matches
+
+    def extract(self, item: bs4.Tag, base_url: str) -> ShopItem:
+        """
+        Extract the fields of an item.
+        :param item: tag of the item
+        :param base_url: base url of the shop
+        :return: the item
+        """
+        matches = self._match(item)
+        result = self.item_type()
+        failed = []
+        for name, field in self.fields.items():
+            try:
+                tags = matches[field.select]
+                if not tags:
+                    raise ValueError(f"No match for {field.select}")
+                if field.many:
+                    value = [field.value(tag) for tag in tags]
+                else:
+                    value = field.value(tags[0])
+                if field.post is not None:
+                    value = field.post(value)
+                if field.base:
+                    value = base_url + value
+            except (AttributeError, IndexError, TypeError, ValueError):
+                value = field.default if field.default is not None else Record.get(name)
+                failed.append(name)
+            result[name] = value
+        with self._lock:
+            self.items += 1
+            self.failures.update(failed)
+        return result
+
+    def take(self) -> Tuple[int, Counter]:
+        """
+        Get the counts and start counting again.
+        :return: number of items extracted and the failures per field
+        """
+        with self._lock:
+            counts = self.items, self.failures
+            self.items = 0
+            self.failures = Counter()
+            return counts
+
+    def add(self, items: int, failures: Counter):
+        """
+        Add counts taken elsewhere (e.g. in another process).
+        :param items: number of items extracted
+        :param failures: failures per field
+        """
+        with self._lock:
+            self.items += items
+            self.failures.update(failures)
+
+    def report(self) -> str:
+        """
+        Describe the fields which could not be extracted from some items.
+        :return: description (empty if every field was extracted)
+        """
+        with self._lock:
+            return ", ".join(
+                f"{name} {count}/{self.items}"
+                for name, count in self.failures.most_common()
+            )
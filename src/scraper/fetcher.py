@@ -0,0 +1,191 @@
+"""
+Page fetching backends.
+"""
+
+import bs4
+import requests
+import time
+from abc import ABC
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from typing import NamedTuple, Optional
+
+
+class CacheMissError(Exception):
+    """
+    Raised when a page has to be fetched while working offline.
+    """
+
+
+class FetchError(Exception):
+    """
+    Raised on transient fetch failures (worth retrying).
+    """
+
+
+class PageNotReadyError(FetchError):
+    """
+    Raised when a rendered page does not become ready in time, or a downloaded page is not complete.
+    """
+
+
+class Readiness(NamedTuple):
+    """
+    Condition of a rendered page being ready to be read.
+    """
+    selector: str
+    """CSS selector of the elements to wait for."""
+    count: int = 1
+    """Minimal number of elements matching the selector."""
+    timeout: float = 10.0
+    """Seconds to wait before giving up."""
+
+    def is_ready(self, source: str) -> bool:
+        """
+        Check the condition on the source of a page (for pages which are not rendered).
+        :param source: source of the page
+        :return: whether the page is ready
+        """
+        parsed = bs4.BeautifulSoup(source, features="html.parser")
+        return len(parsed.select(self.selector, limit=self.count)) >= self.count
+
+
+class FetcherBase(ABC):
+    """
+    Backend downloading the source of a page.
+    """
+
+    wait_time: Optional[float] = None
+    """Seconds the last fetch waited for the page to be ready (None: it did not wait)."""
+
+    def fetch(self, url: str, readiness: Optional[Readiness] = None) -> str:
+        """
+        Download the source of a page.
+        :param url: url of the page
+        :param readiness: condition of the page being ready (for rendered pages)
+        :return: source of the page
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Release everything held by the fetcher.
+        """
+        pass
+
+
+class SeleniumFetcher(FetcherBase):
+    """
+    Fetch pages rendered by a browser (needed where the listing is built by JavaScript).
+    """
+
+    def __init__(
+            self,
+            driver: webdriver,
+            sleep: float,
+    ):
+        self.driver = driver
+        self.sleep = sleep
+
+    def fetch(self, url: str, readiness: Optional[Readiness] = None) -> str:
+        """
+        Download and render a page.
+        Waits until the page is ready if the condition is given, otherwise sleeps a fixed time.
+        :param url: url of the page
+        :param readiness: condition of the page being ready
+        :return: source of the rendered page
+        """
+        self.wait_time = None
+        try:
+            self.driver.get(url)
+            start = time.monotonic()
+            if readiness is None:
+                time.sleep(self.sleep)
+            else:
+                WebDriverWait(self.driver, readiness.timeout, poll_frequency=0.05).until(
+                    lambda driver: len(driver.find_elements(By.CSS_SELECTOR, readiness.selector)) >= readiness.count
+                )
+            self.wait_time = time.monotonic() - start
+            return self.driver.page_source
+        except TimeoutException as e:
+            raise PageNotReadyError(f"{url} not ready in time") from e
+        except WebDriverException as e:
+            raise FetchError(f"{url}: {e.msg}") from e
+
+    def close(self):
+        """
+        Shut down the browser.
+        """
+        self.driver.quit()
+
+
+class HTTPFetcher(FetcherBase):
+    """
+    Fetch pages with plain HTTP requests over pooled keep-alive connections (for server-rendered pages).
+    """
+
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.66 Safari/537.36"
+        ),
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+    """Headers sent with every request."""
+
+    def __init__(
+            self,
+            timeout: float = 30.0,
+            pool_size: int = 4,
+    ):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str, readiness: Optional[Readiness] = None) -> str:
+        """
+        Download a page. Nothing is rendered so nothing is waited for, but the page has to meet the readiness condition
+        (an empty or throttled page is not complete).
+        :param url: url of the page
+        :param readiness: condition of the page being ready
+        :return: source of the page
+        """
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(f"{url}: {e}") from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise FetchError(f"{url}: HTTP {response.status_code}")
+        response.raise_for_status()
+        if readiness is not None and not readiness.is_ready(response.text):
+            raise PageNotReadyError(f"{url}: less than {readiness.count} of {readiness.selector}")
+        return response.text
+
+    def close(self):
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
+
+
+class OfflineFetcher(FetcherBase):
+    """
+    Fetcher for replaying cached pages only: fails on any attempt to download.
+    """
+
+    def fetch(self, url: str, readiness: Optional[Readiness] = None) -> str:
+        """
+        Refuse to download a page.
+        :param url: url of the page
+        :param readiness: condition of the page being ready
+        :return: never returns
+        """
+        raise CacheMissError(url)
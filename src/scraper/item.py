@@ -5,7 +5,7 @@ Item representation.
 import numpy as np
 import pandas as pd
 from collections import OrderedDict
-from typing import List, Any
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 Record = OrderedDict(
     group=None,
@@ -31,35 +31,42 @@ class ColNames:
     raw = "_raw"
     error = "_error"
     etc = "_others"
+    key = "_key"
 
 
 Record[ColNames.raw] = None
 Record[ColNames.error] = None
 
+_FIELDS = frozenset(Record.keys())
 
-class ShopItem(OrderedDict):
+
+class ShopItem:
     """
     Representation of an item in a shops collection listing (which is NOT necessarily an actual item).
+    The record fields are kept in slots, any other (shop specific) value in an extra dict.
+    Can be used as a mapping too. A callable assigned to an attribute is called right away,
+    its value is the initial value of the field if it fails (see: spieleoffensive.de).
     """
 
+    __slots__ = tuple(Record.keys()) + ("_extra",)
+
     def __init__(
             self,
             **kwargs,
     ):
-        super().__init__()
         for k, v in Record.items():
-            super().__setitem__(k, kwargs.get(k, v))
-        for k, v in kwargs.items():
-            if k not in Record.keys():
-                super().__setitem__(k, v)
-        self._init_complete = True
+            object.__setattr__(self, k, kwargs.pop(k, v))
+        object.__setattr__(self, "_extra", kwargs)
 
     def __getattr__(
             self,
             name: str,
     ):
+        # only called for names which are not record fields
+        if name == "_extra":
+            raise AttributeError(name)
         try:
-            return self.__getitem__(name)
+            return self._extra[name]
         except KeyError:
             raise AttributeError(name)
 
@@ -68,30 +75,136 @@ class ShopItem(OrderedDict):
             key: str,
             value: Any,
     ):
-        if "_init_complete" not in self.__dict__:
-            return super().__setattr__(key, value)
+        if callable(value):
+            try:
+                value = value()
+            except (IndexError, ValueError, AttributeError):
+                value = Record.get(key, None)
+        self[key] = value
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELDS:
+            return object.__getattribute__(self, key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELDS:
+            object.__setattr__(self, key, value)
         else:
-            if callable(value):
-                try:
-                    value = value()
-                except (IndexError, ValueError, AttributeError, IndexError):
-                    value = Record.get(key, None)
-            self.__setitem__(key, value)
+            self._extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELDS or key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(_FIELDS) + len(self._extra)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value.
+        :param key: name of the value
+        :param default: value if there is no such value
+        :return: the value
+        """
+        return self[key] if key in self else default
+
+    def keys(self) -> List[str]:
+        """
+        Names of the values (the record fields first).
+        :return: names
+        """
+        return list(Record.keys()) + list(self._extra.keys())
+
+    def values(self) -> List[Any]:
+        """
+        Values (the record fields first).
+        :return: values
+        """
+        return [self[k] for k in self.keys()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """
+        Names and values (the record fields first).
+        :return: name, value pairs
+        """
+        return [(k, self[k]) for k in self.keys()]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Returns the rows the item is represented by (the values which are not in the record go to `ColNames.etc`).
+        :return: rows
+        """
+        raise NotImplementedError()
 
-    def df(self):
+    def _row(self, index: int = None) -> Dict[str, Any]:
+        def value(v: Any) -> Any:
+            if index is not None and isinstance(v, list):
+                return v[index]
+            return v
+        row = {k: value(object.__getattribute__(self, k)) for k in Record.keys()}
+        row[ColNames.etc] = {k: value(v) for k, v in self._extra.items()}
+        return row
+
+    def df(self) -> pd.DataFrame:
         """
         Returns the item description in a pandas DataFrame.
         :return: dataframe representation
         """
-        raise NotImplementedError()
+        return ItemColumns(items=[self]).df()
 
     @staticmethod
-    def empty_df():
+    def empty_df() -> pd.DataFrame:
         """
         Returns an empty df having all the columns an item would.
         :return: emtpy df
         """
-        return pd.DataFrame(columns=list(Record.keys()) + [ColNames.error, ColNames.raw, ColNames.etc])
+        return ItemColumns().df()
+
+
+class ItemColumns:
+    """
+    Columnar accumulator of items: the values of their rows are appended to a list per column
+    and a single DataFrame is built at the end (instead of one per item).
+    """
+
+    names = list(Record.keys()) + [ColNames.etc]
+    """Column names."""
+
+    def __init__(
+            self,
+            items: Iterable[ShopItem] = (),
+    ):
+        self.values: Dict[str, List[Any]] = {k: [] for k in self.names}
+        for item in items:
+            self.append(item)
+
+    def append(self, item: ShopItem):
+        """
+        Append the rows of an item.
+        :param item: the item
+        """
+        for row in item.rows():
+            for k, values in self.values.items():
+                values.append(row[k] if k in row else Record[k] if k in Record else {})
+
+    def __len__(self) -> int:
+        return len(self.values[ColNames.etc])
+
+    def df(self) -> pd.DataFrame:
+        """
+        Build the DataFrame of the rows appended.
+        :return: DataFrame
+        """
+        return pd.DataFrame(self.values, columns=self.names)
 
 
 class SingleShopItem(ShopItem):
@@ -99,88 +212,35 @@ class SingleShopItem(ShopItem):
     Representation of an item in a shops collection listing - which is an actual item.
     """
 
-    def df(self):
+    __slots__ = ()
+
+    def rows(self) -> List[Dict[str, Any]]:
         """
-        Return DataFrame representation of the item.
-        :return: DataFrame
+        Return the single row of the item.
+        :return: rows
         """
-        s = pd.Series(
-            index=Record.keys(),
-            data=[getattr(self, k) for k in Record.keys()],
-        )
-        s[ColNames.etc] = {
-            k: v
-            for k, v in self.items()
-            if k not in Record.keys()
-        }
-        return pd.DataFrame.from_records([s])
+        return [self._row()]
 
 
 class CompositeShopItem(ShopItem):
     """
     Representation of an item in a shops collection listing - which can represent multiple items (see: nobleknight.com).
+    List values are split into a row each, other values are repeated in every row.
     """
 
-    def _column(
-            self,
-            key: str,
-            length: int,
-    ) -> List:
-        value = getattr(self, key)
-        if isinstance(value, list):
-            return value
-        else:
-            return [value for _ in range(length)]
+    __slots__ = ()
 
-    def df(self):
+    def rows(self) -> List[Dict[str, Any]]:
         """
-        Return DataFrame representation of the item(s).
-        :return: DataFrame
+        Return the rows of the item(s), or a row of the error if the lists differ in length.
+        :return: rows
         """
         lengths = [len(v) for v in self.values() if isinstance(v, list)]
-        if lengths:
-            try:
-                assert min(lengths) == max(lengths), "Bad Shopitems as list length fluctuate."
-                length = lengths[0]
-                df = pd.DataFrame(
-                    data=[self._column(k, length) for k in Record.keys()],
-                    index=list(Record.keys()),
-                    columns=range(length),
-                )
-                etc_keys = [k for k in self.keys() if k not in Record.keys()]
-                dfx = pd.DataFrame(
-                    data=[self._column(k, length) for k in etc_keys],
-                    index=list(etc_keys),
-                    columns=range(length),
-                )
-                # noinspection PyTypeChecker
-                df2 = pd.DataFrame(
-                    data=[dfx.apply(pd.Series.to_dict).values],
-                    index=[ColNames.etc],
-                    columns=df.columns,
-                )
-                return (
-                    pd.concat([
-                        df,
-                        df2,
-                    ])
-                    .transpose()
-                )
-            except Exception as e:
-                return pd.Series(
-                    data={
-                        ColNames.raw: self._raw,
-                        ColNames.error: e,
-                    }
-                )
-        else:
-            s = pd.Series(
-                index=Record.keys(),
-                data=[getattr(self, k) for k in Record.keys()],
-            )
-            s[ColNames.etc] = {
-                k: v
-                for k, v in self.items()
-                if k not in Record.keys()
-            }
-            return pd.DataFrame.from_records([s])
+        if not lengths:
+            return [self._row()]
+        if min(lengths) != max(lengths):
+            return [{
+                ColNames.raw: self[ColNames.raw],
+                ColNames.error: AssertionError("Bad Shopitems as list length fluctuate."),
+            }]
+        return [self._row(i) for i in range(lengths[0])]
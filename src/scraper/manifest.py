@@ -0,0 +1,118 @@
+"""
+Manifest of a run to resume it after a crash.
+"""
+
+import json
+import os
+import pandas as pd
+import shutil
+import threading
+from .page import PageBase
+from slugify import slugify
+from typing import Any, Dict, Iterator, Optional
+
+
+class Manifest:
+    """
+    Record of the finished pages of a run (the last page of each url group, item counts and the parsed items).
+    A restarted run restores the finished pages instead of loading and parsing them again.
+    The record is a journal: a JSON line is appended per change, and it is compacted when it is loaded.
+    """
+
+    def __init__(
+            self,
+            folder: str,
+    ):
+        self.folder = folder
+        self.path = f"{folder}/manifest.jsonl"
+        self._lock = threading.Lock()
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(folder, exist_ok=True)
+        if os.path.isfile(self.path):
+            self._load()
+
+    def _group(self, url_format: str) -> Dict[str, Any]:
+        return self.groups.setdefault(url_format, dict(max_page=None, pages={}))
+
+    def _apply(self, line: Dict[str, Any]):
+        group = self._group(line["url_format"])
+        if "max_page" in line:
+            group["max_page"] = line["max_page"]
+        else:
+            group["pages"][line["url"]] = dict(items=line["items"], df=line["df"])
+
+    def _lines(self) -> Iterator[Dict[str, Any]]:
+        for url_format, group in self.groups.items():
+            if group["max_page"] is not None:
+                yield dict(url_format=url_format, max_page=group["max_page"])
+            for url, entry in group["pages"].items():
+                yield dict(url_format=url_format, url=url, **entry)
+
+    def _load(self):
+        with open(self.path, "r") as fin:
+            for line in fin:
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    # the last line is cut if the run crashed while appending it
+                    break
+        # one line per page and group instead of one per change
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as fout:
+            fout.writelines(json.dumps(line) + "\n" for line in self._lines())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, line: Dict[str, Any]):
+        # has to be called holding the lock
+        self._apply(line)
+        with open(self.path, "a") as fout:
+            fout.write(json.dumps(line) + "\n")
+
+    def max_page(self, url_format: str) -> Optional[int]:
+        """
+        Get the last page of an url group if known.
+        :param url_format: url format of the group
+        :return: last page or None
+        """
+        with self._lock:
+            return self._group(url_format)["max_page"]
+
+    def set_max_page(self, url_format: str, max_page: int):
+        """
+        Record the last page of an url group.
+        :param url_format: url format of the group
+        :param max_page: last page
+        """
+        with self._lock:
+            self._append(dict(url_format=url_format, max_page=max_page))
+
+    def restore(self, page: PageBase) -> bool:
+        """
+        Restore the items of a page if it was finished.
+        :param page: page to restore
+        :return: whether the page was finished
+        """
+        with self._lock:
+            entry = self._group(page.url_format)["pages"].get(page.url)
+        if entry is None:
+            return False
+        page.restore(pd.read_pickle(entry["df"]))
+        return True
+
+    def finish(self, page: PageBase):
+        """
+        Store the items of a successfully parsed page and record it as finished.
+        :param page: parsed page
+        """
+        if page.error is not None:
+            return
+        path = f"{self.folder}/{slugify(page.url)}.pickle"
+        page.df.to_pickle(path)
+        with self._lock:
+            self._append(dict(url_format=page.url_format, url=page.url, items=len(page.df), df=path))
+
+    def remove(self):
+        """
+        Delete the manifest and the stored items (once the run is complete).
+        """
+        shutil.rmtree(self.folder, ignore_errors=True)
@@ -4,74 +4,282 @@ Page representation options.
 
 import bs4
 import json
-import os
 import pandas as pd
-import pickle
-import time
+import re
 from abc import ABC
-from scraper.item import ShopItem, SingleShopItem, ColNames
-from selenium import webdriver
-from slugify import slugify
-from typing import Any, Dict, List
+from collections import Counter
+from currency import parse_prices
+from functools import lru_cache
+from scraper.extract import Extractor, Field
+from scraper.fetcher import CacheMissError, FetcherBase, Readiness
+from scraper.item import ItemColumns, ShopItem, SingleShopItem, ColNames
+from scraper.parsed import ParsedCache, fingerprint
+from scraper.store import PageStore
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple, Type
+
+
+@lru_cache(maxsize=None)
+def _tag_pattern(name: str) -> Pattern:
+    # opening and closing tags of a name (group 1: closing, group 2: self-closing)
+    return re.compile(rf"<(/?)(?i:{re.escape(name)})(?=[\s/>])[^>]*?(/?)>")
+
+
+_TABLE_CONTEXTS = dict(
+    caption=("<table>", "</table>"),
+    thead=("<table>", "</table>"),
+    tbody=("<table>", "</table>"),
+    tfoot=("<table>", "</table>"),
+    tr=("<table><tbody>", "</tbody></table>"),
+    td=("<table><tbody><tr>", "</tr></tbody></table>"),
+    th=("<table><tbody><tr>", "</tr></tbody></table>"),
+)
+"""Tags which are dropped outside of a table by html5lib, and the table around them."""
+
+
+class Region:
+    """
+    Part of a page needed to parse it: the tags with a name and/or attribute values (and everything inside them).
+    """
+
+    def __init__(
+            self,
+            name: Optional[str] = None,
+            **attrs: str,
+    ):
+        self.name = name
+        self.attrs = {key.rstrip("_"): value for key, value in attrs.items()}
+        name_pattern = re.escape(name) if name is not None else r"[a-zA-Z][\w-]*"
+        attr_patterns = "".join(
+            rf"""(?=[^>]*\sclass\s*=\s*["']?[^"'>]*(?<![\w-]){re.escape(value)}(?![\w-]))"""
+            if key == "class" else
+            rf"""(?=[^>]*\s{re.escape(key)}\s*=\s*["']?{re.escape(value)}["'\s/>])"""
+            for key, value in self.attrs.items()
+        )
+        self._pattern = re.compile(rf"<(?P<name>(?i:{name_pattern}))(?=[\s/>]){attr_patterns}[^>]*>")
+
+    def spans(self, raw: str) -> List[Tuple[int, int, str]]:
+        """
+        Find the region in a raw page (by the nesting of the tags with the same name, without parsing the page).
+        :param raw: raw page
+        :return: start, end and tag name of every occurrence
+        """
+        spans = []
+        for match in self._pattern.finditer(raw):
+            name = match.group("name").lower()
+            if match.group(0).endswith("/>"):
+                spans.append((match.start(), match.end(), name))
+                continue
+            end = len(raw)
+            depth = 1
+            for tag in _tag_pattern(name).finditer(raw, match.end()):
+                if tag.group(2):
+                    continue
+                depth += -1 if tag.group(1) else 1
+                if depth == 0:
+                    end = tag.end()
+                    break
+            spans.append((match.start(), end, name))
+        return spans
+
+    def matches(self, name: str, attrs: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Check whether a tag starts the region (a class matches if it is one of the classes of the tag).
+        :param name: name of the tag
+        :param attrs: attributes of the tag (None: unknown, only the name is checked)
+        :return: whether it matches
+        """
+        if self.name is not None and name != self.name:
+            return False
+        if attrs is None:
+            return True
+        for key, value in self.attrs.items():
+            actual = attrs.get(key)
+            if actual is None:
+                return False
+            if key == "class":
+                actual = actual if isinstance(actual, list) else actual.split()
+                if value not in actual:
+                    return False
+            elif actual != value:
+                return False
+        return True
 
 
 class PageBase(ABC):
     """
     Representation of a page (and related caching).
+    Without a fetcher the page is only loaded and parsed when `load` and `parse` are called (see: `Crawler`).
     """
 
+    readiness: Optional[Readiness] = None
+    """Condition of a rendered page being ready to be read, checked on downloaded pages too (None: wait a fixed time)."""
+
     def __init__(
             self,
-            driver: webdriver,
+            fetcher: Optional[FetcherBase],
             name: str,
             base_url: str,
             url_name: str,
             date: str,
             url_format: str,
             page: int,
-            sleep: float,
             item_limit: int,
             page_size: int,
+            reparse: bool = False,
     ):
         self.name = name
         self.base_url = base_url
         self.url_name = url_name
         self.date = date
+        self.url_format = url_format
         self.url = url_format.format(page=page)
         self.page = page
-        self.sleep = sleep
         self.item_limit = item_limit
         self.page_size = page_size
+        self.reparse = reparse
 
-        folder = f"../data/page/{slugify(self.name)}"
-        file_name = f"{self.date}_{slugify(self.url)}.pickle"
-        try:
-            os.mkdir(folder)
-        except FileExistsError:
-            pass
-        self.path = f"{folder}/{file_name}"
-        try:
-            self._load_raw(driver)
-            self.parsed = self._parse_page(self.raw)
-            self.listing = self._parse_listing(self.parsed)
-            self.grid = self._parse_grid(self.listing)
-            self.items = self._safe_parse_items(self.grid, item_limit)
-            if self.items:
-                self.df = (
-                    pd.concat(map(lambda x: x.df(), self.items))
-                    .assign(discount=lambda x: x.orig_price / x.orig_old_price * (-100) + 100)
-                )
+        self.store = PageStore.for_shop(self.name)
+        self.parsed_cache = ParsedCache.for_shop(self.name)
+        self.digest = None
+        self.raw = None
+        self.df = None
+        self._max_page = 1
+        self.error = None
+        self.load_error = None
+        self.wait_time = None
+        if fetcher is not None:
+            try:
+                self.load(fetcher)
+            except CacheMissError:
+                raise
+            except Exception as e:
+                self.fail(e, loading=True)
             else:
-                self.df = ShopItem.empty_df()
-        except Exception as e:
+                self.parse()
+
+    @property
+    def is_cached(self) -> bool:
+        """Whether the page can be loaded without fetching it."""
+        return self.store.has(self.date, self.url)
+
+    def load(self, fetcher: Optional[FetcherBase]):
+        """
+        Load the raw page from the cache or (if missing) using the fetcher.
+        :param fetcher: fetcher to use on cache miss (can be None for cached pages)
+        """
+        self._load_raw(fetcher)
+
+    @property
+    def max_page(self) -> int:
+        """The number of the last page (according to the parsed page)."""
+        return self._max_page
+
+    def parse(self):
+        """
+        Parse the loaded raw page into the DataFrame of its items (errors are recorded in the DataFrame).
+        Pages with the same content parsed by the same parser version are taken from the parsed cache.
+        The raw page is dropped once parsed (it is kept in the store, see: `digest`).
+        """
+        if not self.parse_cached():
+            self.parse_raw()
+            self.raw = None
+
+    def parse_cached(self) -> bool:
+        """
+        Take the items from the parsed cache (unless parsing again was asked for).
+        :return: whether the page was cached
+        """
+        version = fingerprint(type(self))
+        if self.reparse or self.digest is None or version is None:
+            return False
+        cached = self.parsed_cache.get(self.digest, version, self.item_limit)
+        if cached is None:
+            return False
+        self.df, self._max_page = cached
+        self.raw = None
+        return True
+
+    def parse_raw(self):
+        """
+        Parse the loaded raw page (without looking at the parsed cache) and cache the result.
+        """
+        # the parse tree is not kept, the items only refer to their raw page (see: `raw_item`)
+        try:
+            parsed = self._parse_page(self.raw)
+            self._max_page = self._parse_max_page(parsed)
+            grid = self._parse_grid(self._parse_listing(parsed))
+            items = self._safe_parse_items(grid, self.item_limit)
             self.df = (
-                SingleShopItem(**{
-                    ColNames.error: e,
-                    ColNames.etc: dict(
-                        path=self.path,
-                    ),
-                }).df()
+                ItemColumns(items)
+                .df()
+                # the fields may give the price texts of the page (see: `parse_prices`)
+                .assign(
+                    orig_price=lambda x: parse_prices(x.orig_price),
+                    orig_old_price=lambda x: parse_prices(x.orig_old_price),
+                )
+                .assign(discount=lambda x: x.orig_price / x.orig_old_price * (-100) + 100)
             )
+        except Exception as e:
+            self.fail(e)
+            return
+        version = fingerprint(type(self))
+        if self.digest is not None and version is not None:
+            self.parsed_cache.put(self.digest, version, self.item_limit, self.df, self._max_page)
+
+    def use_parsed(self, parsed: "Parsed"):
+        """
+        Use the result of parsing the page in another process.
+        :param parsed: the result
+        """
+        self.df = parsed.df
+        self._max_page = parsed.max_page
+        self.error = parsed.error
+        self.raw = None
+        extractor = self.extractor()
+        if extractor is not None:
+            extractor.add(parsed.items, parsed.failures)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the stores are shared in a process, they are looked up again after unpickling
+        state = self.__dict__.copy()
+        del state["store"]
+        del state["parsed_cache"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.store = PageStore.for_shop(self.name)
+        self.parsed_cache = ParsedCache.for_shop(self.name)
+
+    def restore(self, df: pd.DataFrame):
+        """
+        Use the DataFrame of an earlier parse instead of loading and parsing the page.
+        :param df: DataFrame of the items
+        """
+        self.df = df
+
+    @property
+    def is_missing(self) -> bool:
+        """Whether the page could not be loaded."""
+        return self.load_error is not None
+
+    def fail(self, e: Exception, loading: bool = False):
+        """
+        Record an error instead of the items of the page.
+        :param e: the error
+        :param loading: whether the page could not be loaded (see: `is_missing`)
+        """
+        self.error = e
+        if loading:
+            self.load_error = e
+        self.df = (
+            SingleShopItem(**{
+                ColNames.error: e,
+                ColNames.etc: dict(
+                    url=self.url,
+                ),
+            }).df()
+        )
 
     def _safe_parse_items(
             self,
@@ -81,36 +289,68 @@ class PageBase(ABC):
         if item_limit > 0:
             grid = grid[:item_limit]
         items = []
-        for item_raw in grid:
+        for index, item_raw in enumerate(grid):
             item = self._parse_item(base_url=self.base_url, item=item_raw)
-            item[ColNames.raw] = item_raw
+            item[ColNames.raw] = f"{self.digest}#{index}" if self.digest is not None else None
             items.append(item)
         return items
 
+    @classmethod
+    def raw_item(cls, name: str, ref: str) -> str:
+        """
+        Materialise the raw item a value of the `_raw` column refers to (by parsing its page again).
+        :param name: name of the shop
+        :param ref: the reference (digest of the page and index of the item)
+        :return: raw item
+        """
+        digest, index = ref.rsplit("#", 1)
+        raw = PageStore.for_shop(name).read(digest)
+        return str(list(cls._parse_grid(cls._parse_listing(cls._parse_page(raw))))[int(index)])
+
     def _save_raw(self):
         assert self.raw is not None, "Can't save before the value is set"
-        if self.path is not None:
-            with open(self.path, "wb") as fout:
-                pickle.dump(self.raw, fout)
-
-    def _load_raw(self, driver):
-        assert not hasattr(self, "raw") or self.raw is None, "Can't load after the value is set"
-        if self.path is not None and os.path.exists(self.path) and os.path.isfile(self.path):
-            with open(self.path, "rb") as fin:
-                self.raw = pickle.load(fin)
+        self.digest = self.store.put(self.date, self.url, self.raw)
+
+    def _load_raw(self, fetcher: Optional[FetcherBase]):
+        assert self.raw is None, "Can't load after the value is set"
+        if self.is_cached:
+            self.digest, self.raw = self.store.get(self.date, self.url)
         else:
-            driver.get(self.url)
-            time.sleep(self.sleep)
-            self.raw = driver.page_source
-            self._save_raw()
+            self.use_download(*self.download(fetcher))
+
+    def download(self, fetcher: FetcherBase) -> Tuple[str, Optional[float]]:
+        """
+        Fetch the raw page without changing the page (a fetch given up on must not change it, see: `Crawler`).
+        :param fetcher: fetcher to use
+        :return: raw page and seconds spent waiting for it to be ready (None: not waited for)
+        """
+        raw = fetcher.fetch(self.url, readiness=self.readiness)
+        return raw, fetcher.wait_time
+
+    def use_download(self, raw: str, wait_time: Optional[float]):
+        """
+        Use a fetched raw page (and cache it).
+        :param raw: raw page
+        :param wait_time: seconds spent waiting for it to be ready (None: not waited for)
+        """
+        assert self.raw is None, "Can't load after the value is set"
+        self.raw = raw
+        self.wait_time = wait_time
+        self._save_raw()
 
     @staticmethod
     def _parse_page(raw: str) -> Any:
         raise NotImplementedError()
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    @classmethod
+    def extractor(cls) -> Optional[Extractor]:
+        """
+        Get the declarative extraction of the items of the page class.
+        :return: extractor (None if the page implements `_parse_item` instead)
+        """
+        return None
+
+    def _parse_max_page(self, parsed: Any) -> int:
         raise NotImplementedError()
 
     @staticmethod
@@ -153,13 +393,68 @@ class HTML5PageBase(PageBase, ABC):
     Representation of a HTML5 page.
     """
 
-    @staticmethod
-    def _parse_page(raw: str) -> bs4.BeautifulSoup:
+    parser: str = "html5lib"
+    """BeautifulSoup tree builder ("html5lib", "lxml" or "html.parser", see: `compare_parsers.py`)."""
+
+    fields: Optional[Dict[str, Field]] = None
+    """Extraction of the item fields (None: `_parse_item` is implemented instead)."""
+
+    item_type: Type[ShopItem] = SingleShopItem
+    """Item class the fields are extracted into."""
+
+    regions: Optional[List[Region]] = None
+    """Parts of the page needed to parse it, the rest is skipped (None: the whole page)."""
+
+    @classmethod
+    def _strainer(cls) -> Optional[bs4.SoupStrainer]:
+        if cls.regions is None or cls.parser == "html5lib":
+            return None
+        return bs4.SoupStrainer(
+            lambda name, attrs=None: any(region.matches(name, attrs) for region in cls.regions),
+        )
+
+    @classmethod
+    def _slice(cls, raw: str) -> str:
+        # html5lib can't skip tags while parsing (see: `_strainer`), it gets the regions cut out of the raw page instead
+        # (the whole page if a region is not found)
+        if cls.regions is None or cls.parser != "html5lib":
+            return raw
+        spans = []
+        for region in cls.regions:
+            region_spans = region.spans(raw)
+            if not region_spans:
+                return raw
+            spans.extend(region_spans)
+        parts = []
+        end = 0
+        for span_start, span_end, name in sorted(spans):
+            if span_start < end:
+                continue
+            before, after = _TABLE_CONTEXTS.get(name, ("", ""))
+            parts.extend((before, raw[span_start:span_end], after))
+            end = span_end
+        return "<html><body>" + "".join(parts) + "</body></html>"
+
+    @classmethod
+    def _parse_page(cls, raw: str) -> bs4.BeautifulSoup:
         return bs4.BeautifulSoup(
-            raw,
-            features='html5lib',
+            cls._slice(raw),
+            features=cls.parser,
+            parse_only=cls._strainer(),
         )
 
+    @classmethod
+    def extractor(cls) -> Optional[Extractor]:
+        """
+        Get the compiled `fields` of the page class.
+        :return: extractor (None if the page implements `_parse_item` instead)
+        """
+        if cls.fields is None:
+            return None
+        if "_extractor" not in cls.__dict__:
+            cls._extractor = Extractor(cls.item_type, cls.fields)
+        return cls._extractor
+
     @staticmethod
     def _parse_listing(parsed: bs4.BeautifulSoup) -> bs4.BeautifulSoup:
         raise NotImplementedError()
@@ -168,6 +463,45 @@ class HTML5PageBase(PageBase, ABC):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         raise NotImplementedError()
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> ShopItem:
-        raise NotImplementedError()
+    @classmethod
+    def _parse_item(cls, base_url: str, item: bs4.BeautifulSoup) -> ShopItem:
+        extractor = cls.extractor()
+        if extractor is None:
+            raise NotImplementedError()
+        return extractor.extract(item, base_url=base_url)
+
+
+class Parsed(NamedTuple):
+    """
+    Result of parsing a page in another process.
+    """
+    df: pd.DataFrame
+    """Items of the page."""
+    max_page: int
+    """Number of the last page."""
+    error: Optional[Exception]
+    """Error of parsing the page."""
+    items: int
+    """Number of items extracted by the fields of the page class."""
+    failures: Counter
+    """Number of items each field could not be extracted from."""
+
+
+def parse_remote(page: PageBase) -> Parsed:
+    """
+    Parse a loaded page (to be run in a worker process, see: `Crawler`).
+    :param page: the page
+    :return: the result
+    """
+    extractor = page.extractor()
+    if extractor is not None:
+        extractor.take()
+    page.parse_raw()
+    items, failures = extractor.take() if extractor is not None else (0, Counter())
+    return Parsed(
+        df=page.df,
+        max_page=page.max_page,
+        error=page.error,
+        items=items,
+        failures=failures,
+    )
@@ -0,0 +1,114 @@
+"""
+Cache of parsed pages.
+"""
+
+import hashlib
+import inspect
+import os
+import pandas as pd
+import pickle
+import sys
+import threading
+from functools import lru_cache
+from importlib import metadata
+from slugify import slugify
+from typing import Dict, Optional, Tuple
+
+
+def _version(distribution: str) -> str:
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+@lru_cache(maxsize=None)
+def fingerprint(page_type: type) -> Optional[str]:
+    """
+    Version of a parser: hash of the source of every module the page class and its bases are defined in
+    (and of the item, extraction and price parsing modules), and of the versions of the parsing libraries.
+    :param page_type: page class
+    :return: hex digest (None if the source is not available)
+    """
+    module_names = sorted(
+        {klass.__module__ for klass in page_type.__mro__ if klass.__module__ not in ("abc", "builtins")}
+        | {"scraper.item", "scraper.extract", "currency.converter"}
+    )
+    parser = getattr(page_type, "parser", None)
+    versions = [
+        f"beautifulsoup4={_version('beautifulsoup4')}",
+        f"soupsieve={_version('soupsieve')}",
+        f"{parser}={_version(parser) if parser in ('html5lib', 'lxml') else sys.version}",
+    ]
+    sha = hashlib.sha256()
+    try:
+        for module_name in module_names:
+            sha.update(inspect.getsource(sys.modules[module_name]).encode("utf-8"))
+    except (KeyError, OSError, TypeError):
+        return None
+    sha.update("\n".join(versions).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class ParsedCache:
+    """
+    Items and last page number parsed from raw pages of a shop, keyed by the hash of the raw page,
+    the fingerprint of the parser and the item limit. Results of a changed parser are never used.
+    """
+
+    __caches: Dict[str, "ParsedCache"] = {}
+    __caches_lock = threading.Lock()
+
+    def __init__(
+            self,
+            folder: str,
+    ):
+        self.folder = folder
+
+    @classmethod
+    def for_shop(cls, name: str) -> "ParsedCache":
+        """
+        Get the (shared) cache of a shop.
+        :param name: name of the shop
+        :return: cache
+        """
+        folder = f"../data/parsed/{slugify(name)}"
+        with cls.__caches_lock:
+            if folder not in cls.__caches:
+                cls.__caches[folder] = cls(folder)
+            return cls.__caches[folder]
+
+    def _path(self, digest: str, version: str, item_limit: int) -> str:
+        return f"{self.folder}/{version[:16]}/{digest}_{item_limit}.pickle"
+
+    def get(self, digest: str, version: str, item_limit: int) -> Optional[Tuple[pd.DataFrame, int]]:
+        """
+        Get a cached result.
+        :param digest: hash of the raw page
+        :param version: fingerprint of the parser
+        :param item_limit: number of items parsed (0: all)
+        :return: items and last page number, or None if not cached
+        """
+        path = self._path(digest, version, item_limit)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as fin:
+            cached = pickle.load(fin)
+        os.utime(path)
+        return cached
+
+    def put(self, digest: str, version: str, item_limit: int, df: pd.DataFrame, max_page: int):
+        """
+        Cache a result.
+        :param digest: hash of the raw page
+        :param version: fingerprint of the parser
+        :param item_limit: number of items parsed (0: all)
+        :param df: items
+        :param max_page: last page number
+        """
+        path = self._path(digest, version, item_limit)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fout:
+            pickle.dump((df, max_page), fout)
+        os.replace(tmp_path, path)
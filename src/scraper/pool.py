@@ -0,0 +1,77 @@
+"""
+Pool of reusable resources (e.g. webdrivers) shared between worker threads.
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List
+
+
+class ResourcePool:
+    """
+    Bounded pool of resources handing out each resource to one worker at a time.
+    Resources are only created when a worker needs one and none is idle.
+    """
+
+    def __init__(
+            self,
+            factory: Callable[[], Any],
+            size: int = 1,
+            closer: Callable[[Any], None] = None,
+    ):
+        assert size > 0, "Pool size has to be positive."
+        self.size = size
+        self._factory = factory
+        self._closer = closer
+        self._resources = []
+        self._created = 0
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+
+    def _get(self) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        try:
+            resource = self._factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._resources.append(resource)
+        return resource
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        Borrow a resource for the duration of the context (blocks until one is idle or can be created).
+        :return: the resource
+        """
+        resource = self._get()
+        try:
+            yield resource
+        finally:
+            self._idle.put(resource)
+
+    @property
+    def resources(self) -> List[Any]:
+        """All the resources created so far (idle or not)."""
+        return list(self._resources)
+
+    def close(self):
+        """
+        Close every resource in the pool.
+        """
+        if self._closer is not None:
+            for resource in self._resources:
+                self._closer(resource)
+        self._resources = []
@@ -2,17 +2,25 @@
 Shop representation options.
 """
 
+import asyncio
 import pandas as pd
 import sys
+from .crawler import Crawler, RateLimit, RetryPolicy
+from .dataset import Dataset
+from .delta import delta, item_keys
+from .fetcher import FetcherBase, OfflineFetcher, SeleniumFetcher
 from .item import ColNames
+from .manifest import Manifest
 from .page import PageBase
+from .pool import ResourcePool
+from .sink import ParquetSink, SinkBase
 from collections import OrderedDict
 from currency import get_rate, convert_series
+from functools import partial
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from slugify import slugify
-from tqdm import tqdm
-from typing import Any, Tuple, Type
+from typing import Dict, List, Tuple, Type
 from uploader.sheets import GSpreadWrapper
 
 
@@ -33,57 +41,109 @@ class ShopBase:
             page_size: int,
             currency: str,
             dimensions: Tuple[int, int],
-            sleep: float,
+            rate_limit: RateLimit,
             spreadsheet: str = None,
             *,
             url_limit: int = 0,
             page_limit: int = 0,
             item_limit: int = 0,
             headless: bool = True,
+            drivers: int = 1,
+            fetcher_type: Type[FetcherBase] = SeleniumFetcher,
+            sleep: float = 0.1,
+            offline: bool = False,
+            retry: RetryPolicy = RetryPolicy(),
+            parse_workers: int = 0,
+            reparse: bool = False,
+            keep_raw: bool = False,
+            sink_types: Tuple[Type[SinkBase], ...] = (ParquetSink,),
     ):
         self.spreadsheet = spreadsheet
         self.name = name
         self.base_url = base_url
         self.date = date
 
-        self.path = f"../data/shop/{self.date}_{slugify(self.name)}_LIMIT_{url_limit}_{page_limit}_{item_limit}.xlsx"
+        self.path = f"../data/shop/{self.date}_{slugify(self.name)}_LIMIT_{url_limit}_{page_limit}_{item_limit}"
+        """Path of the output files without the extension (see: `sink_types`)."""
+        # parsing again from the cache does not resume
+        self.manifest = None if reparse else Manifest(
+            folder=f"../data/run/{slugify(self.name)}/{self.date}_LIMIT_{url_limit}_{page_limit}_{item_limit}",
+        )
         self.page_type = page_type
         self.page_size = page_size
         self.currency = currency
-        self.rate = get_rate(currency, BASE_CURRENCY)
-        self.driver = self._new_driver(
-            dimensions,
-            headless,
-        )
+        self.rate = get_rate(currency, BASE_CURRENCY, date=self.date)
+        self.dimensions = dimensions
+        self.headless = headless
+        self.rate_limit = rate_limit
+        self.retry = retry
         self.sleep = sleep
-        url_formats = self._url_formats()
-        if url_limit > 0:
-            url_formats = {
-                k: url_formats[k]
-                for i, k in enumerate(url_formats)
-                if i < url_limit
-            }
-        self.pages = OrderedDict(
-            (
-                url_name,
-                self._get_pages(
-                    driver=self.driver,
-                    name=name,
-                    base_url=base_url,
-                    url_name=url_name,
-                    date=self.date,
-                    url_format=url_format,
-                    page_type=page_type,
-                    sleep=sleep,
+        self.parse_workers = parse_workers
+        self.reparse = reparse
+        self.keep_raw = keep_raw
+        self.sinks = [sink_type() for sink_type in sink_types]
+        self.fetcher_type = OfflineFetcher if offline or reparse else fetcher_type
+        self.fetcher_pool = ResourcePool(
+            factory=self._new_fetcher,
+            size=drivers,
+            closer=lambda fetcher: fetcher.close(),
+        )
+        extractor = self.page_type.extractor()
+        if extractor is not None:
+            # the counts of the earlier runs of the page class in the process (`--all`, reparsing) are not reported
+            extractor.take()
+        try:
+            url_formats = self._url_formats()
+            if url_limit > 0:
+                url_formats = {
+                    k: url_formats[k]
+                    for i, k in enumerate(url_formats)
+                    if i < url_limit
+                }
+            self.pages = asyncio.run(
+                self._crawl(
+                    url_formats=url_formats,
                     page_limit=page_limit,
                     item_limit=item_limit,
-                    page_size=page_size,
-                ),
-            ) for url_name, url_format in url_formats.items()
-        )
+                )
+            )
+        finally:
+            self.fetcher_pool.close()
+        wait_times = self.wait_times
+        if not wait_times.empty:
+            print(
+                f"Waited for {len(wait_times)} pages to be ready {wait_times.mean():.2f}s on average "
+                f"({wait_times.max():.2f}s at most).",
+                flush=True,
+            )
+        field_failures = extractor.report() if extractor is not None else ""
+        if field_failures:
+            print(f"Fields not found (items): {field_failures}", flush=True)
+        missing_pages = self.missing_pages
+        if missing_pages:
+            print(f"Missing {len(missing_pages)} pages:", *missing_pages, sep="\n", flush=True)
         self.df = self._parse_df()
-        self.df.to_excel(self.path, index=False)
-        self.driver.close()
+        # the references to the raw items are only useful for debugging (see: `PageBase.raw_item`)
+        output = self.df if self.keep_raw else self.df.drop(columns=[ColNames.raw])
+        self.paths = [sink.write(output, self.path) for sink in self.sinks]
+        self.delta = None
+        """Changes since the previous run (None: limited, incomplete or first run, see: `scraper.delta`)."""
+        # limited (test) runs and runs with missing pages are left out of the history
+        # (the items of the missing pages would show up as removed, then as new the day after)
+        if url_limit == 0 and page_limit == 0 and item_limit == 0 and not missing_pages:
+            dataset = Dataset()
+            previous_dates = [d for d in dataset.dates(self.name) if d < self.date]
+            if previous_dates:
+                self.delta = delta(
+                    previous=dataset.read(shops=[self.name], start=previous_dates[-1], end=previous_dates[-1]),
+                    current=output,
+                )
+                delta_path = f"../data/delta/{self.date}_{slugify(self.name)}"
+                self.paths.extend(sink.write(self.delta, delta_path) for sink in self.sinks)
+                print(f"Changes since {previous_dates[-1]}: {len(self.delta)}", flush=True)
+            dataset.append(self.name, self.date, output)
+        if not missing_pages and self.manifest is not None:
+            self.manifest.remove()
 
     @staticmethod
     def _new_driver(
@@ -98,60 +158,148 @@ class ShopBase:
         driver.set_window_size(*dimensions)
         return driver
 
+    def _new_fetcher(self) -> FetcherBase:
+        if issubclass(self.fetcher_type, SeleniumFetcher):
+            return self.fetcher_type(
+                driver=self._new_driver(
+                    self.dimensions,
+                    self.headless,
+                ),
+                sleep=self.sleep,
+            )
+        else:
+            return self.fetcher_type()
+
     def _url_formats(self) -> OrderedDict:
         raise NotImplementedError()
 
+    def _get_page(
+            self,
+            page_type: Type[PageBase],
+            url_name: str,
+            url_format: str,
+            item_limit: int = 0,
+    ) -> PageBase:
+        """
+        Load and parse a single page outside of the crawl (e.g. to find the urls to crawl).
+        :param page_type: page class
+        :param url_name: name of the url group
+        :param url_format: url of the page (`page` is set to 1)
+        :param item_limit: number of items to parse (0: all)
+        :return: the page
+        """
+        async def get_page() -> PageBase:
+            crawler = Crawler(
+                fetcher_pool=self.fetcher_pool,
+                rate_limit=self.rate_limit,
+                retry=self.retry,
+            )
+            try:
+                return await crawler.page(
+                    new_page=partial(
+                        page_type,
+                        name=self.name,
+                        base_url=self.base_url,
+                        url_name=url_name,
+                        date=self.date,
+                        url_format=url_format,
+                        item_limit=item_limit,
+                        page_size=self.page_size,
+                        reparse=self.reparse,
+                    ),
+                    page=1,
+                )
+            finally:
+                crawler.close()
+        return asyncio.run(get_page())
+
+    async def _crawl(
+            self,
+            url_formats: Dict[str, str],
+            page_limit: int,
+            item_limit: int,
+    ) -> OrderedDict:
+        crawler = Crawler(
+            fetcher_pool=self.fetcher_pool,
+            rate_limit=self.rate_limit,
+            retry=self.retry,
+            manifest=self.manifest,
+            parse_workers=self.parse_workers,
+        )
+        try:
+            pages = OrderedDict()
+            for url_name, url_format in url_formats.items():
+                pages[url_name] = await self._get_pages(
+                    crawler=crawler,
+                    name=self.name,
+                    base_url=self.base_url,
+                    url_name=url_name,
+                    date=self.date,
+                    url_format=url_format,
+                    page_type=self.page_type,
+                    page_limit=page_limit,
+                    item_limit=item_limit,
+                    page_size=self.page_size,
+                    reparse=self.reparse,
+                )
+            return pages
+        finally:
+            crawler.close()
+
     @classmethod
-    def _get_pages(
+    async def _get_pages(
             cls,
-            driver: webdriver,
+            crawler: Crawler,
             name: str,
             base_url: str,
             url_name: str,
             date: str,
             url_format: str,
             page_type: Type[PageBase],
-            sleep: float,
             page_limit: int,
             item_limit: int,
             page_size: int,
-    ) -> Any:
+            reparse: bool = False,
+    ) -> List[PageBase]:
         sys.stdout.flush()
         print(f"Downloading from: {url_format.format(page='PAGE')}", flush=True)
-        pages = []
-        page1 = page_type(
-            driver=driver,
-            name=name,
-            base_url=base_url,
-            url_name=url_name,
-            date=date,
-            url_format=url_format,
-            page=1,
-            sleep=sleep,
-            item_limit=item_limit,
-            page_size=page_size,
-        )
-        pages.append(page1)
-        max_page = page1.max_page
-        if page_limit < 1:
-            page_limit = max_page
-        for p in tqdm(range(1, page_limit+1)):
-            if p == 1:
-                continue
-            page = page_type(
-                driver=driver,
+        return await crawler.pages(
+            new_page=partial(
+                page_type,
                 name=name,
                 base_url=base_url,
                 url_name=url_name,
                 date=date,
                 url_format=url_format,
-                page=p,
-                sleep=sleep,
                 item_limit=item_limit,
                 page_size=page_size,
-            )
-            pages.append(page)
-        return pages
+                reparse=reparse,
+            ),
+            page_limit=page_limit,
+        )
+
+    @property
+    def wait_times(self) -> pd.Series:
+        """Seconds spent waiting for each rendered page to be ready (cached and not rendered pages are left out)."""
+        return pd.Series(
+            [
+                page.wait_time
+                for page_group in self.pages.values()
+                for page in page_group
+                if page.wait_time is not None
+            ],
+            dtype=float,
+        )
+
+    @property
+    def missing_pages(self) -> List[str]:
+        """Urls of the pages which could not be loaded."""
+        return [
+            page.url
+            for page_group in self.pages.values()
+            for page in page_group
+            if page.is_missing
+        ]
 
     def _parse_df(self) -> pd.DataFrame:
         df = (
@@ -169,11 +317,27 @@ class ShopBase:
                 converted_old_price=lambda x: round(convert_series(x.orig_old_price, rate=self.rate), 3),
                 conversion_rate=self.rate,
                 currency=self.currency,
+                # before sorting: the rows of a composite item are numbered in the order of the page
+                **{ColNames.key: item_keys},
             )
             .sort_values(["discount", "title"], ascending=[0, 1])
         )
         return df
 
+    def upload_delta(self):
+        """
+        Upload the changes since the previous run to Google Spreadsheets (the "<name> delta" sheet).
+        """
+        assert self.spreadsheet is not None, "Can't upload when spreadsheet was not set."
+        if self.delta is None or self.delta.empty:
+            return
+        GSpreadWrapper(
+            spreadsheet=self.spreadsheet,
+        ).upload(
+            sheet=f"{self.name} delta",
+            df=self.delta,
+        )
+
     def upload(self):
         """
         Upload the DataFrame representation of the shop to Google Spreadsheets.
@@ -192,7 +356,7 @@ class ShopBase:
         (
             uploader.upload(
                 sheet=self.name,
-                df=self.df.drop([ColNames.raw, ColNames.error], axis=1)
+                df=self.df.drop([ColNames.raw, ColNames.error, ColNames.key], axis=1)
             )
         )
         uploader.set_value_by_lookup(
@@ -0,0 +1,125 @@
+"""
+Output formats of the DataFrame of a shop.
+"""
+
+import json
+import pandas as pd
+from abc import ABC
+from .item import ColNames, Record
+from typing import Any, Dict, Type
+
+DTYPES: Dict[str, str] = {
+    **{
+        name: "float64" if isinstance(value, float) else "string"
+        for name, value in Record.items()
+    },
+    ColNames.etc: "string",
+    ColNames.key: "string",
+}
+"""Column types of the output (numbers are floats, everything else is text)."""
+
+
+def _error_text(error: Any) -> Any:
+    if error is None or (isinstance(error, float) and pd.isna(error)):
+        return None
+    return f"{type(error).__name__}: {error}"
+
+
+def _etc_text(etc: Any) -> Any:
+    if not isinstance(etc, dict):
+        return None
+    return json.dumps(etc, default=str, ensure_ascii=False, sort_keys=True)
+
+
+def typed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Give the columns their output types (see: `DTYPES`): errors become "<type>: <message>",
+    the shop specific values (`_others`) a JSON object.
+    :param df: DataFrame of a shop
+    :return: DataFrame of the output
+    """
+    converters = {
+        ColNames.error: lambda x: x[ColNames.error].map(_error_text),
+        ColNames.etc: lambda x: x[ColNames.etc].map(_etc_text),
+    }
+    return (
+        df
+        .assign(**{name: converter for name, converter in converters.items() if name in df.columns})
+        .astype({name: dtype for name, dtype in DTYPES.items() if name in df.columns})
+    )
+
+
+class SinkBase(ABC):
+    """
+    Format of the written DataFrame of a shop.
+    """
+
+    extension: str = None
+    """Extension of the files."""
+
+    def write(self, df: pd.DataFrame, path: str) -> str:
+        """
+        Write the DataFrame of a shop (with the output types, see: `typed`).
+        :param df: DataFrame of a shop
+        :param path: path of the file without the extension
+        :return: path of the file
+        """
+        path = f"{path}.{self.extension}"
+        self._write(typed(df).reset_index(drop=True), path)
+        return path
+
+    def _write(self, df: pd.DataFrame, path: str):
+        raise NotImplementedError()
+
+
+class ParquetSink(SinkBase):
+    """
+    Parquet file (compressed, columnar: the fastest to read).
+    """
+
+    extension = "parquet"
+
+    def _write(self, df: pd.DataFrame, path: str):
+        df.to_parquet(path, index=False)
+
+
+class FeatherSink(SinkBase):
+    """
+    Feather file (uncompressed Arrow: the fastest to write).
+    """
+
+    extension = "feather"
+
+    def _write(self, df: pd.DataFrame, path: str):
+        df.to_feather(path)
+
+
+class CSVSink(SinkBase):
+    """
+    CSV file.
+    """
+
+    extension = "csv"
+
+    def _write(self, df: pd.DataFrame, path: str):
+        df.to_csv(path, index=False)
+
+
+class ExcelSink(SinkBase):
+    """
+    Excel file (slow to write and read, to be opened by hand).
+    """
+
+    extension = "xlsx"
+
+    def _write(self, df: pd.DataFrame, path: str):
+        df.to_excel(path, index=False)
+
+
+SINKS: Dict[str, Type[SinkBase]] = dict(
+    parquet=ParquetSink,
+    feather=FeatherSink,
+    csv=CSVSink,
+    excel=ExcelSink,
+)
+"""Output formats by name (see: `--format`)."""
@@ -0,0 +1,359 @@
+"""
+Content-addressed storage of raw pages.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import threading
+import zlib
+from slugify import slugify
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+
+class _Location(NamedTuple):
+    pack: str
+    offset: int
+    length: int
+
+
+class PageStore:
+    """
+    Raw pages of a shop: every distinct page content is stored once (compressed, named by its hash),
+    while a small index per date maps the urls to the contents.
+    Contents are appended to one pack per date (with a table of the offset and length of each content in the pack)
+    and read through memory maps. A content already packed for another date is not packed again.
+    Pages cached in the former layouts (one pickle per date and url, one file per content) are still readable
+    and can be moved into the packs with `migrate`.
+    """
+
+    __stores: Dict[str, "PageStore"] = {}
+    __stores_lock = threading.Lock()
+
+    def __init__(
+            self,
+            folder: str,
+    ):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Dict[str, str]] = {}
+        self._locations: Optional[Dict[str, _Location]] = None
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._touched: Set[str] = set()
+        os.makedirs(f"{folder}/packs", exist_ok=True)
+        os.makedirs(f"{folder}/index", exist_ok=True)
+
+    @classmethod
+    def for_shop(cls, name: str) -> "PageStore":
+        """
+        Get the (shared) store of a shop.
+        :param name: name of the shop
+        :return: store
+        """
+        return cls.at(f"../data/page/{slugify(name)}")
+
+    @classmethod
+    def at(cls, folder: str) -> "PageStore":
+        """
+        Get the (shared) store in a folder.
+        :param folder: folder of the store
+        :return: store
+        """
+        with cls.__stores_lock:
+            if folder not in cls.__stores:
+                cls.__stores[folder] = cls(folder)
+            return cls.__stores[folder]
+
+    @staticmethod
+    def digest(raw: str) -> str:
+        """
+        Hash of a page content.
+        :param raw: page content
+        :return: hex digest
+        """
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _object_path(self, digest: str) -> str:
+        return f"{self.folder}/objects/{digest[:2]}/{digest}.z"
+
+    def _pack_path(self, pack: str) -> str:
+        return f"{self.folder}/packs/{pack}.pack"
+
+    def _table_path(self, pack: str) -> str:
+        return f"{self.folder}/packs/{pack}.idx"
+
+    def _index_path(self, date: str) -> str:
+        return f"{self.folder}/index/{date}.tsv"
+
+    def _legacy_path(self, date: str, url: str) -> str:
+        return f"{self.folder}/{date}_{slugify(url)}.pickle"
+
+    def _legacy_paths(self, date: str) -> List[str]:
+        return [
+            entry.path
+            for entry in os.scandir(self.folder)
+            if entry.is_file() and entry.name.startswith(f"{date}_") and entry.name.endswith(".pickle")
+        ]
+
+    def _loose_paths(self) -> Dict[str, str]:
+        if not os.path.isdir(f"{self.folder}/objects"):
+            return {}
+        return {
+            entry.name[:-len(".z")]: entry.path
+            for prefix in os.scandir(f"{self.folder}/objects")
+            if prefix.is_dir()
+            for entry in os.scandir(prefix.path)
+            if entry.name.endswith(".z")
+        }
+
+    def _packs(self) -> List[str]:
+        return sorted(
+            entry.name[:-len(".idx")]
+            for entry in os.scandir(f"{self.folder}/packs")
+            if entry.name.endswith(".idx")
+        )
+
+    def _touch(self, date: str):
+        if date not in self._touched and os.path.isfile(self._index_path(date)):
+            os.utime(self._index_path(date))
+            self._touched.add(date)
+
+    def _read_locations(self) -> Dict[str, _Location]:
+        # has to be called holding the lock
+        if self._locations is None:
+            locations = {}
+            for pack in self._packs():
+                with open(self._table_path(pack), "r", encoding="utf-8") as fin:
+                    for line in fin:
+                        digest, offset, length = line.rstrip("\n").split("\t")
+                        locations[digest] = _Location(pack, int(offset), int(length))
+            self._locations = locations
+        return self._locations
+
+    def _map(self, location: _Location) -> mmap.mmap:
+        # has to be called holding the lock
+        mapped = self._maps.get(location.pack)
+        if mapped is None or len(mapped) < location.offset + location.length:
+            # maps are not closed explicitly as readers may still use the former map
+            with open(self._pack_path(location.pack), "rb") as fin:
+                mapped = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[location.pack] = mapped
+        return mapped
+
+    def _append(self, pack: str, digest: str, compressed: bytes) -> _Location:
+        # has to be called holding the lock
+        with open(self._pack_path(pack), "ab") as fout:
+            offset = fout.seek(0, os.SEEK_END)
+            fout.write(compressed)
+        with open(self._table_path(pack), "a", encoding="utf-8") as fout:
+            fout.write(f"{digest}\t{offset}\t{len(compressed)}\n")
+        location = _Location(pack, offset, len(compressed))
+        self._read_locations()[digest] = location
+        return location
+
+    def _read_compressed(self, digest: str) -> Union[bytes, memoryview]:
+        with self._lock:
+            location = self._read_locations().get(digest)
+            if location is not None:
+                mapped = self._map(location)
+        if location is None:
+            with open(self._object_path(digest), "rb") as fin:
+                return fin.read()
+        return memoryview(mapped)[location.offset:location.offset + location.length]
+
+    def index(self, date: str) -> Dict[str, str]:
+        """
+        Get the index of a date.
+        :param date: date of the pages
+        :return: url -> digest (pages moved from the pickle layout are indexed by the slug of the url)
+        """
+        with self._lock:
+            if date not in self._indexes:
+                index = {}
+                if os.path.isfile(self._index_path(date)):
+                    with open(self._index_path(date), "r", encoding="utf-8") as fin:
+                        for line in fin:
+                            digest, url = line.rstrip("\n").split("\t", 1)
+                            index[url] = digest
+                self._indexes[date] = index
+            return self._indexes[date]
+
+    def _lookup(self, date: str, url: str) -> Optional[str]:
+        index = self.index(date)
+        return index.get(url) or index.get(slugify(url))
+
+    def has(self, date: str, url: str) -> bool:
+        """
+        Check whether a page is stored.
+        :param date: date of the page
+        :param url: url of the page
+        :return: whether it is stored
+        """
+        return self._lookup(date, url) is not None or os.path.isfile(self._legacy_path(date, url))
+
+    def get(self, date: str, url: str) -> Tuple[str, str]:
+        """
+        Read a stored page.
+        :param date: date of the page
+        :param url: url of the page
+        :return: digest and content of the page
+        """
+        digest = self._lookup(date, url)
+        if digest is None:
+            with open(self._legacy_path(date, url), "rb") as fin:
+                raw = pickle.load(fin)
+            os.utime(self._legacy_path(date, url))
+            return self.digest(raw), raw
+        self._touch(date)
+        return digest, self.read(digest)
+
+    def read(self, digest: str) -> str:
+        """
+        Read a stored content (pages in the pickle layout can only be read by url, see: `get`).
+        :param digest: digest of the content
+        :return: content
+        """
+        return zlib.decompress(self._read_compressed(digest)).decode("utf-8")
+
+    def put(self, date: str, url: str, raw: str) -> str:
+        """
+        Store a page (the content is only packed if no identical content is stored yet).
+        :param date: date of the page
+        :param url: url of the page
+        :param raw: content of the page
+        :return: digest of the content
+        """
+        digest = self.digest(raw)
+        index = self.index(date)
+        with self._lock:
+            if digest not in self._read_locations() and not os.path.isfile(self._object_path(digest)):
+                self._append(date, digest, zlib.compress(raw.encode("utf-8")))
+            with open(self._index_path(date), "a", encoding="utf-8") as fout:
+                fout.write(f"{digest}\t{url}\n")
+            index[url] = digest
+        return digest
+
+    def dates(self) -> List[str]:
+        """
+        Get the dates with stored pages.
+        :return: dates
+        """
+        dates = {
+            entry.name[:-len(".tsv")]
+            for entry in os.scandir(f"{self.folder}/index")
+            if entry.name.endswith(".tsv")
+        }
+        dates.update(
+            entry.name.split("_", 1)[0]
+            for entry in os.scandir(self.folder)
+            if entry.is_file() and "_" in entry.name and entry.name.endswith(".pickle")
+        )
+        return sorted(dates)
+
+    def last_used(self, date: str) -> float:
+        """
+        Time the pages of a date were last written or read.
+        :param date: date of the pages
+        :return: timestamp
+        """
+        paths = self._legacy_paths(date)
+        if os.path.isfile(self._index_path(date)):
+            paths.append(self._index_path(date))
+        return max(map(os.path.getmtime, paths), default=0.0)
+
+    def size(self) -> int:
+        """
+        Get the size of the store.
+        :return: bytes
+        """
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(self.folder)
+            for name in names
+        )
+
+    def _referencing_dates(self) -> Dict[str, str]:
+        return {
+            digest: date
+            for date in self.dates()
+            for digest in self.index(date).values()
+        }
+
+    def remove_dates(self, dates: Iterable[str]) -> Tuple[int, int]:
+        """
+        Delete the pages of dates. Their packs are deleted too: the contents other dates still refer to
+        are moved to the pack of the latest of those dates first.
+        :param dates: dates to delete
+        :return: number and size of the deleted files
+        """
+        dates = set(dates)
+        paths = []
+        with self._lock:
+            for date in dates:
+                paths.extend(self._legacy_paths(date))
+                if os.path.isfile(self._index_path(date)):
+                    paths.append(self._index_path(date))
+                self._indexes.pop(date, None)
+                self._touched.discard(date)
+            files, size = self._remove(paths)
+        remaining_dates = self.dates()
+        referencing_dates = self._referencing_dates()
+        with self._lock:
+            locations = self._read_locations()
+            for pack in self._packs():
+                if pack in remaining_dates:
+                    continue
+                kept = [
+                    (digest, location)
+                    for digest, location in locations.items()
+                    if location.pack == pack and digest in referencing_dates
+                ]
+                for digest, location in kept:
+                    compressed = self._map(location)[location.offset:location.offset + location.length]
+                    size -= len(compressed)
+                    self._append(referencing_dates[digest], digest, compressed)
+                self._maps.pop(pack, None)
+                pack_files, pack_size = self._remove([self._pack_path(pack), self._table_path(pack)])
+                files += pack_files
+                size += pack_size
+            self._locations = None
+            loose_files, loose_size = self._remove([
+                path
+                for digest, path in self._loose_paths().items()
+                if digest not in referencing_dates
+            ])
+        return files + loose_files, size + loose_size
+
+    def migrate(self) -> Tuple[int, int]:
+        """
+        Move the pages stored in the former layouts into the packs.
+        Pickled pages are indexed by the slug of their url (the url itself is not known).
+        :return: number of pickled pages and of content files moved
+        """
+        pickles = 0
+        for date in self.dates():
+            for path in self._legacy_paths(date):
+                with open(path, "rb") as fin:
+                    raw = pickle.load(fin)
+                self.put(date, os.path.basename(path)[len(f"{date}_"):-len(".pickle")], raw)
+                os.remove(path)
+                pickles += 1
+        referencing_dates = self._referencing_dates()
+        objects = 0
+        with self._lock:
+            for digest, path in self._loose_paths().items():
+                if digest in referencing_dates and digest not in self._read_locations():
+                    with open(path, "rb") as fin:
+                        self._append(referencing_dates[digest], digest, fin.read())
+                os.remove(path)
+                objects += 1
+        return pickles, objects
+
+    @staticmethod
+    def _remove(paths: List[str]) -> Tuple[int, int]:
+        size = 0
+        for path in paths:
+            size += os.path.getsize(path)
+            os.remove(path)
+        return len(paths), size
@@ -3,11 +3,14 @@ board-game.co.uk
 """
 
 import bs4
-import numpy as np
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import HTTPFetcher
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
-from scraper import SingleShopItem
 
 
 class Page(HTML5PageBase):
@@ -15,11 +18,25 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    readiness = Readiness(".zg-products-list .zg-product")
+    """Wait for the items of the listing."""
+
+    regions = [Region(class_="zg-products-list"), Region(class_="bpf-filter-paging-links")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field(".zg-product-title"),
+        stock=Field(".zg-product-notice", strip=False),
+        orig_price=Field(".zg-product-prices .zg-product-price span"),
+        orig_old_price=Field(".zg-product-prices .zg-product-rrp span"),
+        url=Field(".zg-product-image-container a", attr="href"),
+        image_url=Field(".zg-product-image-container img", attr="src"),
+    )
+    """Item fields."""
+
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.find(class_='bpf-filter-paging-links').findAll("a")[-2].get("data-page"))
+            return int(parsed.find(class_='bpf-filter-paging-links').findAll("a")[-2].get("data-page"))
         except (AttributeError, ValueError, TypeError, IndexError):
             return 1
 
@@ -31,61 +48,6 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.findAll(class_='zg-product')
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            s.title = item.find(class_='zg-product-title').text.strip()
-        except (AttributeError, TypeError, ValueError):
-            s.title = ""
-        try:
-            s.stock = item.find(class_='zg-product-notice').text
-        except (AttributeError, TypeError, ValueError):
-            s.stock = ""
-        try:
-            price_box = item.find(class_="zg-product-prices")
-            try:
-                s.orig_price = (
-                    price_box
-                    .find(class_="zg-product-price")
-                    .find("span")
-                    .text
-                    .replace("£", "")
-                    .replace(" ", "")
-                )
-                s.orig_price = float(s.orig_price)
-            except (AttributeError, TypeError, ValueError):
-                s.orig_price = np.NaN
-            try:
-                s.orig_old_price = (
-                    price_box
-                    .find(class_="zg-product-rrp")
-                    .find("span")
-                    .text
-                    .replace("£", "")
-                    .replace(" ", "")
-                )
-                s.orig_old_price = float(s.orig_old_price)
-            except (AttributeError, TypeError, ValueError):
-                s.orig_old_price = np.NaN
-        except (AttributeError, TypeError, ValueError):
-            s.orig_price = np.NaN
-            s.orig_old_price = np.NaN
-        try:
-            image_box = item.find(class_='zg-product-image-container')
-            try:
-                s.url = image_box.find("a").get("href")
-            except (AttributeError, TypeError, ValueError):
-                s.url = ""
-            try:
-                s.image_url = image_box.find("img").get("src")
-            except (AttributeError, TypeError, ValueError):
-                s.image_url = ""
-        except (AttributeError, TypeError, ValueError):
-            s.url = ""
-            s.image_url = ""
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -95,10 +57,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="boardgamecouk",
@@ -107,13 +66,11 @@ class Shop(ShopBase):
             page_size=80,
             currency="GBP",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=2.0, max_in_flight=2, burst=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            fetcher_type=HTTPFetcher,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -3,11 +3,14 @@ coolstuffinc.com
 """
 
 import bs4
-import numpy as np
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import HTTPFetcher
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
-from scraper import SingleShopItem
 
 
 class Page(HTML5PageBase):
@@ -15,11 +18,29 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    readiness = Readiness("div#mainContent div.product-search-row")
+    """Wait for the items of the listing."""
+
+    regions = [Region("div", id="mainContent"), Region("a", class_="pagelink")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field("a.productLink img", attr="alt"),
+        url=Field("a.productLink", attr="href", base=True),
+        image_url=Field("a.productLink img", attr="src"),
+        stock=Field(
+            "span.card-qty",
+            tag=True,
+            post=lambda x: " ".join([x.text.strip(), list(x.next_siblings)[-1].strip()]),
+        ),
+        orig_old_price=Field("span.d strike"),
+        orig_price=Field("b[itemprop=price]"),
+    )
+    """Item fields."""
+
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.find_all("a", class_="pagelink")[-3].text.strip())
+            return int(parsed.find_all("a", class_="pagelink")[-3].text.strip())
         except (ValueError, IndexError, AttributeError):
             return 1
 
@@ -31,45 +52,6 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.find_all("div", class_="product-search-row")
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            link = item.find("a", class_="productLink")
-            try:
-                s.title = link.find("img").get("alt").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.title = ""
-            try:
-                s.url = base_url + link.get("href").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.url = ""
-            try:
-                s.image_url = link.find("img").get("src").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.image_url = ""
-        except (AttributeError, TypeError, ValueError):
-            s.title = ""
-            s.url = ""
-            s.image_url = ""
-        try:
-            s.stock = item.find("span", class_="card-qty")
-            s.stock = " ".join([
-                s.stock.text.strip(),
-                list(item.find("span", class_="card-qty").next_siblings)[-1].strip(),
-            ])
-        except (AttributeError, TypeError, ValueError):
-            s.stock = ""
-        try:
-            s.orig_old_price = float(item.find("span", class_="d").find("strike").text.replace("$", "").strip())
-        except (AttributeError, TypeError, ValueError):
-            s.orig_old_price = np.NaN
-        try:
-            s.orig_price = float(item.find("b", itemprop="price").text.strip())
-        except (AttributeError, TypeError, ValueError):
-            s.orig_price = np.NaN
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -79,10 +61,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="coolstuffinccom",
@@ -91,13 +70,11 @@ class Shop(ShopBase):
             page_size=30,
             currency="USD",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=2.0, max_in_flight=2, burst=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            fetcher_type=HTTPFetcher,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -3,11 +3,13 @@ funagain.com
 """
 
 import bs4
-import numpy as np
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
-from scraper import SingleShopItem
 
 
 class Page(HTML5PageBase):
@@ -15,11 +17,25 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    readiness = Readiness(".product-grid-item")
+    """Wait for the items of the listing."""
+
+    regions = [Region(class_="product-grid-item"), Region(class_="pagination-custom")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field("p"),
+        stock=Field(tag=True, post=lambda x: "Unavailable" if x.find("span", text="Unavailable") else "Available"),
+        orig_price=Field(".product-item--price small", many=True, post=lambda x: float(x[0].replace("$", "")) / 100),
+        orig_old_price=Field(".product-item--price small", many=True, post=lambda x: float(x[2].replace("$", "")) / 100),
+        url=Field(attr="href", post=lambda x: x.split("?")[0], base=True),
+        image_url=Field("img", attr="srcset", post=lambda x: "https:" + x.split(",")[-1].split("?")[0].strip(" ")),
+    )
+    """Item fields."""
+
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.find(class_="pagination-custom").find_all("a")[-2].text.strip())
+            return int(parsed.find(class_="pagination-custom").find_all("a")[-2].text.strip())
         except (ValueError, IndexError, AttributeError):
             return 1
 
@@ -31,42 +47,6 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.find_all(class_="product-grid-item")
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            s.title = item.find("p").text.strip()
-        except (AttributeError, TypeError, ValueError):
-            s.title = ""
-        try:
-            s.stock = "Unavailable" if item.find("span", text="Unavailable") else "Available"
-        except (AttributeError, TypeError, ValueError):
-            s.stock = ""
-        try:
-            price_box = item.find(class_="product-item--price")
-            orig_price, _, orig_old_price, *_ = *price_box.find_all("small"), None, None, None
-            try:
-                s.orig_price = float(orig_price.text.replace("$", "").strip()) / 100
-            except (AttributeError, TypeError, ValueError):
-                s.orig_price = np.NaN
-            try:
-                # noinspection PyUnresolvedReferences
-                s.orig_old_price = float(orig_old_price.text.replace("$", "").strip()) / 100
-            except (AttributeError, TypeError, ValueError):
-                s.orig_old_price = np.NaN
-        except (AttributeError, TypeError, ValueError):
-            s.orig_price = np.NaN
-            s.orig_old_price = np.NaN
-        try:
-            s.url = base_url + item.get("href").strip().split("?")[0]
-        except (AttributeError, TypeError, ValueError):
-            s.url = np.NaN
-        try:
-            s.image_url = "https:" + item.find("img").get("srcset").split(",")[-1].split("?")[0].strip(" ")
-        except (AttributeError, TypeError, ValueError):
-            s.image_url = ""
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -76,10 +56,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="funagaincom",
@@ -88,13 +65,10 @@ class Shop(ShopBase):
             page_size=24,
             currency="USD",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=1.0, max_in_flight=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -3,12 +3,14 @@ milan-spiele.de
 """
 
 import bs4
-import numpy as np
 import re
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
-from scraper import SingleShopItem
 from typing import List, Tuple
 
 
@@ -17,18 +19,33 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
-    stock_regex = re.compile("images/.*[.]gif")
-    """Regex for stock status check."""
+    readiness = Readiness("table.productListing tr.productListing-odd")
+    """Wait for the items of the listing."""
+
+    regions = [Region("table", class_="productListing"), Region(class_="smallText")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field("strong"),
+        stock=Field(
+            'img[src*="images/"][src*=".gif"]',
+            tag=True,
+            post=lambda x: f"{x.get('alt').strip()} - {x.get('src').replace('images/', '').replace('.gif', '')}",
+        ),
+        url=Field("a", attr="href"),
+        image_url=Field("img", attr="src", post=lambda x: x.replace("/imagecache/", "/")),
+        orig_price=Field("nobr", many=True, post=lambda x: x[-1]),
+        orig_old_price=Field("nobr", many=True, post=lambda x: x[-2]),
+    )
+    """Item fields."""
 
     count_regex = re.compile("Artikel [0-9]* bis [0-9]*[(]von ([0-9]*)[)]")
     """Regex to find total count."""
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
             total = int(
-                self.count_regex.findall(self.parsed.find(class_="smallText").text.strip())[0]
+                self.count_regex.findall(parsed.find(class_="smallText").text.strip())[0]
             )
             return (total - 1) // self.page_size + 1
         except (AttributeError, TypeError, ValueError, IndexError):
@@ -42,51 +59,19 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.find_all("tr", class_="productListing-odd")
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            s.title = item.find("strong").text.strip()
-        except (AttributeError, TypeError, ValueError):
-            s.title = None
-        try:
-            x = item.find("img", src=re.compile("images/.*[.]gif"))
-            s.stock = f"{x.get('alt').strip()} - {x.get('src').replace('images/','').replace('.gif','')}"
-        except (AttributeError, TypeError, ValueError):
-            s.stock = None
-        try:
-            s.url = item.find("a").get("href").strip()
-        except (AttributeError, TypeError, ValueError):
-            s.url = None
-        try:
-            s.image_url = item.find("img").get("src").replace("/imagecache/", "/").strip()
-        except (AttributeError, TypeError, ValueError):
-            s.image_url = None
-        try:
-            prices = item.find_all("nobr")
-            try:
-                s.orig_price = float(prices[-1].text.replace(",", ".").replace("€", "").strip())
-            except (AttributeError, TypeError, ValueError):
-                s.orig_price = np.NaN
-            try:
-                # noinspection PyUnresolvedReferences
-                s.orig_old_price = float(prices[-2].text.replace(",", ".").replace("€", "").strip())
-            except (AttributeError, TypeError, ValueError):
-                s.orig_old_price = np.NaN
-        except (AttributeError, TypeError, ValueError):
-            s.orig_price = np.NaN
-            s.orig_old_price = np.NaN
-        return s
-
 
 class SubPage(HTML5PageBase):
     """
     Subpage representation to look up the URL we should normally walk.
     """
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    fields = dict(
+        title=Field(default=""),
+        url=Field(attr="href", default=""),
+    )
+    """Item fields."""
+
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         return 1
 
     @staticmethod
@@ -100,19 +85,6 @@ class SubPage(HTML5PageBase):
         except (AttributeError, TypeError, ValueError, IndexError):
             return bs4.ResultSet([])
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            s.title = item.text.strip()
-        except (AttributeError, TypeError):
-            s.title = ""
-        try:
-            s.url = item.get("href").strip()
-        except (AttributeError, TypeError):
-            s.url = ""
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -122,10 +94,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="milanspielede",
@@ -134,13 +103,10 @@ class Shop(ShopBase):
             page_size=250,
             currency="EUR",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=1.0, max_in_flight=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -171,17 +137,10 @@ class Shop(ShopBase):
             title: str,
             url: str,
     ) -> List[Tuple[str, str]]:
-        sub_page = SubPage(
-            driver=self.driver,
-            name=self.name,
-            base_url=self.base_url,
+        sub_page = self._get_page(
+            page_type=SubPage,
             url_name=self.name,
-            date=self.date,
             url_format=url,
-            page=1,
-            sleep=self.sleep,
-            item_limit=0,
-            page_size=self.page_size,
         )
         if sub_page.df.empty:
             return [(
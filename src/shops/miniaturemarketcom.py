@@ -3,11 +3,13 @@ miniaturemarket.com
 """
 
 import bs4
-import numpy as np
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
-from scraper import SingleShopItem
 
 
 PAGE_SIZE_MULTIPLIER = 32
@@ -19,6 +21,22 @@ class Page(HTML5PageBase):
     PAgE representation.
     """
 
+    readiness = Readiness("div.product-grid div.item")
+    """Wait for the items of the listing."""
+
+    regions = [Region("div", class_="product-grid"), Region("a", href="#")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field("a.product-image", attr="title"),
+        url=Field("a.product-image", attr="href"),
+        image_url=Field("a.product-image img", attr="src", post=lambda x: "http:" + x),
+        stock=Field(".availability"),
+        orig_price=Field("span.price", many=True, post=lambda x: x[-1]),
+        orig_old_price=Field("span.price", many=True, post=lambda x: x[-2]),
+    )
+    """Item fields."""
+
     def __init__(
         self,
         page: int,
@@ -31,11 +49,9 @@ class Page(HTML5PageBase):
             **kwargs,
         )
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.find_all("a", href="#")[-1].text.strip())
+            return int(parsed.find_all("a", href="#")[-1].text.strip())
         except (ValueError, IndexError, AttributeError):
             return 1
 
@@ -47,48 +63,6 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.find_all("div", class_="item")
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        try:
-            link = item.find("a", class_="product-image")
-            try:
-                s.title = link.get("title").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.title = ""
-            try:
-                s.url = link.get("href").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.url = ""
-            try:
-                s.image_url = "http:" + link.find("img").get("src").strip()
-            except (AttributeError, TypeError, ValueError):
-                s.image_url = ""
-        except (AttributeError, TypeError, ValueError):
-            s.title = ""
-            s.url = ""
-            s.image_url = ""
-        try:
-            s.stock = item.find(class_="availability").text.strip()
-        except (AttributeError, TypeError, ValueError):
-            s.stock = ""
-        try:
-            prices = item.find_all("span", class_="price")[::-1]
-            s.orig_price, s.orig_old_price, *_ = *prices, None, None
-            try:
-                s.orig_price = float(s.orig_price.text.replace("$", "").strip())
-            except (AttributeError, TypeError, ValueError):
-                s.orig_price = np.NaN
-            try:
-                # noinspection PyUnresolvedReferences
-                s.orig_old_price = float(s.orig_old_price.text.replace("$", "").strip())
-            except (AttributeError, TypeError, ValueError):
-                s.orig_old_price = np.NaN
-        except (AttributeError, TypeError, ValueError):
-            s.orig_price = np.NaN
-            s.orig_old_price = np.NaN
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -98,10 +72,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="miniaturemarketcom",
@@ -110,13 +81,10 @@ class Shop(ShopBase):
             page_size=PAGE_SIZE_MULTIPLIER,
             currency="USD",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=1.0, max_in_flight=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -7,8 +7,12 @@ import numpy as np
 import re
 from collections import OrderedDict
 from scraper import HTML5PageBase
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
 from scraper import CompositeShopItem
+from scraper import Field
 from typing import Pattern
 
 
@@ -43,12 +47,49 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    readiness = Readiness(".listing-col .product-card")
+    """Wait for the items of the listing."""
+
+    regions = [Region(class_="listing-col"), Region(class_="page-link")]
+    """Parse the listing and the pagination only."""
+
+    item_type = CompositeShopItem
+    """An item lists every condition of the product."""
+
+    fields = dict(
+        title=Field(".name"),
+        stock=Field(".conditions .condition-value", many=True, strip=False),
+        orig_price=Field(
+            ".conditions .price-wrapper",
+            many=True,
+            tag=True,
+            post=lambda x: [NobleKnightPriceParser.get_price(i, NobleKnightPriceParser.price) for i in x],
+        ),
+        orig_old_price=Field(
+            ".conditions .price-wrapper",
+            many=True,
+            tag=True,
+            post=lambda x: [NobleKnightPriceParser.get_price(i, NobleKnightPriceParser.old_price) for i in x],
+        ),
+        msrp=Field(
+            ".conditions .price-wrapper",
+            many=True,
+            tag=True,
+            post=lambda x: [NobleKnightPriceParser.get_price(i, NobleKnightPriceParser.msrp) for i in x],
+        ),
+        url=Field(".image-col", attr="href", base=True),
+        image_url=Field(
+            ".image-col .bg-img-container",
+            attr="style",
+            post=lambda x: x.replace("background-image: url('", "").replace("');", ""),
+        ),
+    )
+    """Item fields."""
+
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.findAll(class_='page-link')[-2].text)
-        except ValueError:
+            return int(parsed.findAll(class_='page-link')[-2].text)
+        except (AttributeError, ValueError, TypeError, IndexError):
             return 1
 
     @staticmethod
@@ -59,60 +100,6 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.findAll(class_='product-card')
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> CompositeShopItem:
-        s = CompositeShopItem()
-        try:
-            s.title = item.find(class_='name').text.strip()
-        except (AttributeError, TypeError, ValueError):
-            s.title = ""
-        try:
-            item_box = item.find(class_="conditions")
-            try:
-                s.stock = [i.text for i in item_box.findAll(class_="condition-value")]
-            except (AttributeError, TypeError, ValueError):
-                s.stock = ""
-            try:
-                price_boxes = item_box.findAll(class_="price-wrapper")
-                try:
-                    s.orig_price = []
-                    s.orig_old_price = []
-                    s.msrp = []
-                    nkpp = NobleKnightPriceParser
-                    for price_box in price_boxes:
-                        s.orig_price.append(nkpp.get_price(price_box, nkpp.price))
-                        s.orig_old_price.append(nkpp.get_price(price_box, nkpp.old_price))
-                        s.msrp.append(nkpp.get_price(price_box, nkpp.msrp))
-                except (AttributeError, TypeError, ValueError):
-                    s.orig_price = np.NaN
-                    s.orig_old_price = np.NaN
-                    s.msrp = np.NaN
-            except (AttributeError, TypeError, ValueError):
-                s.orig_price = np.NaN
-                s.orig_old_price = np.NaN
-        except (AttributeError, TypeError, ValueError):
-            s.stock = ""
-        try:
-            image_box = item.find(class_='image-col')
-            try:
-                s.url = base_url + image_box.get("href")
-            except (AttributeError, TypeError, ValueError):
-                s.url = ""
-            try:
-                s.image_url = (
-                    image_box
-                    .find(class_="bg-img-container")
-                    .get("style")
-                    .replace("background-image: url('", "")
-                    .replace("');", "")
-                )
-            except (AttributeError, TypeError, ValueError):
-                s.image_url = ""
-        except (AttributeError, TypeError, ValueError):
-            s.url = ""
-            s.image_url = ""
-        return s
-
 
 class Shop(ShopBase):
     """
@@ -122,10 +109,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="nobleknightcom",
@@ -134,13 +118,10 @@ class Shop(ShopBase):
             page_size=100,
             currency="USD",
             dimensions=(1600, 6000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=1.0, max_in_flight=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
@@ -3,10 +3,14 @@ spieleoffensive.de
 """
 
 import bs4
-import numpy as np
 import re
 from collections import OrderedDict
+from scraper import Field
 from scraper import HTML5PageBase
+from scraper import HTTPFetcher
+from scraper import RateLimit
+from scraper import Readiness
+from scraper import Region
 from scraper import ShopBase
 from scraper import SingleShopItem
 
@@ -16,6 +20,24 @@ class Page(HTML5PageBase):
     Page representation.
     """
 
+    readiness = Readiness("ul.ala li.ala")
+    """Wait for the items of the listing."""
+
+    regions = [Region("ul", class_="ala"), Region("div", class_="nav")]
+    """Parse the listing and the pagination only."""
+
+    fields = dict(
+        title=Field("a.alamain font"),
+        stock=Field("form input", attr="title", many=True, strip=False, post=lambda x: x[-1].split("\n")[1].strip()),
+        url=Field("a.alamain", attr="href", base=True),
+        image_url=Field("img", attr="src", base=True),
+        orig_price=Field('div.ala span:not([class]), div.ala span[class=""]', many=True, post=lambda x: float(".".join(x))),
+    )
+    """Item fields (the old price is computed from the discount, see: `_parse_item`)."""
+
+    discount_regex = re.compile("[?]r=([0-9]+)")
+    """Regex to find the discount in the url of the image."""
+
     def __init__(
             self,
             page: int,
@@ -28,11 +50,9 @@ class Page(HTML5PageBase):
             **kwargs,
         )
 
-    @property
-    def max_page(self) -> int:
-        """The number of the last page."""
+    def _parse_max_page(self, parsed: bs4.BeautifulSoup) -> int:
         try:
-            return int(self.parsed.find("div", class_="nav").find_all("a")[-2].text.strip())
+            return int(parsed.find("div", class_="nav").find_all("a")[-2].text.strip())
         except (IndexError, ValueError, AttributeError, TypeError):
             return 1
 
@@ -44,22 +64,11 @@ class Page(HTML5PageBase):
     def _parse_grid(listing: bs4.BeautifulSoup) -> bs4.ResultSet:
         return listing.find_all("li", class_="ala")
 
-    @staticmethod
-    def _parse_item(base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
-        s = SingleShopItem()
-        s.title = lambda: item.find("a", class_="alamain").find("font").text.strip()
-        s.stock = lambda: item.find("form").find_all("input")[-1].get("title").split("\n")[1].strip()
-        s.url = lambda: f'{base_url}{item.find("a", class_="alamain").get("href").strip()}'
-        s.image_url = lambda: f'{base_url}{item.find("img").get("src").strip()}'
-        s.orig_price = lambda: (
-            float(
-                ".".join(
-                    map(lambda x: x.text.strip(), item.find("div", class_="ala").find_all("span", class_=""))
-                )
-            )
-        )
+    @classmethod
+    def _parse_item(cls, base_url: str, item: bs4.BeautifulSoup) -> SingleShopItem:
+        s = super()._parse_item(base_url=base_url, item=item)
         s.orig_old_price = lambda: (
-            float(s.orig_price) * 100 / (100-int(item.find("img").get("src").split("?r=")[1].split("&")[0]))
+            s.orig_price * 100 / (100 - int(cls.discount_regex.findall(item.find("img").get("src", ""))[0]))
         )
         return s
 
@@ -72,10 +81,7 @@ class Shop(ShopBase):
     def __init__(
             self,
             date: str,
-            url_limit: int = 0,
-            page_limit: int = 0,
-            item_limit: int = 0,
-            headless: bool = True,
+            **kwargs,
     ):
         super().__init__(
             name="spieleoffensivede",
@@ -84,13 +90,11 @@ class Shop(ShopBase):
             page_size=50,
             currency="EUR",
             dimensions=(1600, 3000),
-            sleep=0.1,
+            rate_limit=RateLimit(per_second=2.0, max_in_flight=2, burst=2),
             spreadsheet="BGShops",
             date=date,
-            url_limit=url_limit,
-            page_limit=page_limit,
-            item_limit=item_limit,
-            headless=headless,
+            fetcher_type=HTTPFetcher,
+            **kwargs,
         )
 
     def _url_formats(self) -> OrderedDict:
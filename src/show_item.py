@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+#  coding=utf-8
+"""
+Command line component to show the raw items a downloaded shop refers to (see: the `_raw` column, `--keep-raw`).
+"""
+
+import click
+
+from downloader import _module_name
+from importlib import import_module
+
+
+@click.command()
+@click.argument("url")
+@click.argument("refs", nargs=-1, required=True)
+def _cmd(url, refs):
+    module_name = _module_name(url)
+    page_type = import_module(f"shops.{module_name}").Page
+    for ref in refs:
+        try:
+            raw = page_type.raw_item(module_name, ref)
+        except (ValueError, IndexError, KeyError, OSError) as e:
+            raise click.UsageError(f"Can't find {ref}: {e}")
+        print(f"{ref}:", raw, sep="\n", flush=True)
+
+
+if __name__ == "__main__":
+    _cmd()